@@ -0,0 +1,306 @@
+"""A local stand-in for the Anthropic Message Batches API.
+
+Serves the endpoints nstr-report's backfill uses (create, retrieve and
+results under /v1/messages/batches), validating requests the way the API
+does and answering each one with deterministic placeholder text once a
+batch's processing time has passed. Requests can be made to error or
+expire at a given rate.
+
+Point the Anthropic client at it with ANTHROPIC_BASE_URL:
+
+    python benchmarks/batch_api.py --port 8789 &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8789 nstr-report --backfill 2025-01-01 2025-01-31
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limits enforced by the API
+MAX_BATCH_REQUESTS = 100_000
+CUSTOM_ID_RE = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+_BATCH_PATH_RE = re.compile(r"^/v1/messages/batches/([\w-]+)(/results)?$")
+
+
+@dataclass
+class BatchParams:
+    """Behaviour of the stand-in."""
+
+    seed: int = 1
+    processing_seconds: float = 1.0  # From creation until a batch has ended
+    error_rate: float = 0.0  # Requests that come back errored (overloaded)
+    expire_rate: float = 0.0  # Requests that come back expired
+
+
+@dataclass
+class ServerStats:
+    """Counters reported when the server stops."""
+
+    batches: int = 0
+    requests: int = 0
+    polls: int = 0
+    succeeded: int = 0
+    errored: int = 0
+    expired: int = 0
+    rejected: int = 0  # Invalid create requests
+
+    def summary(self) -> str:
+        return (
+            f"{self.batches} batches, {self.requests} requests ({self.succeeded} succeeded, "
+            f"{self.errored} errored, {self.expired} expired), {self.polls} polls, "
+            f"{self.rejected} rejected"
+        )
+
+
+@dataclass
+class _Batch:
+    id: str
+    requests: list[dict]
+    created_at: datetime
+    ready_at: float  # time.monotonic()
+    outcomes: list[str] = field(default_factory=list)  # Result type per request
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _placeholder(params: dict) -> tuple[str, int]:
+    """Deterministic response text and input token count for a request."""
+    prompt = "".join(
+        content if isinstance(content, str) else json.dumps(content)
+        for content in (message["content"] for message in params["messages"])
+    )
+    system = json.dumps(params.get("system", ""))
+    digest = hashlib.sha256(prompt.encode()).hexdigest()[:12]
+    text = f"Placeholder summary {digest} of {len(prompt)} characters."
+    return text, (len(prompt) + len(system)) // 4
+
+
+def validate_requests(body: object) -> str | None:
+    """Return why a create request is invalid, or None."""
+    if not isinstance(body, dict) or not isinstance(body.get("requests"), list):
+        return "requests: Field required"
+    requests = body["requests"]
+    if not 1 <= len(requests) <= MAX_BATCH_REQUESTS:
+        return f"requests: must contain between 1 and {MAX_BATCH_REQUESTS} items"
+    seen = set()
+    for i, request in enumerate(requests):
+        custom_id = request.get("custom_id") if isinstance(request, dict) else None
+        if not isinstance(custom_id, str) or not CUSTOM_ID_RE.match(custom_id):
+            return f"requests.{i}.custom_id: String should match pattern '{CUSTOM_ID_RE.pattern}'"
+        if custom_id in seen:
+            return f"requests.{i}.custom_id: Duplicate custom_id {custom_id}"
+        seen.add(custom_id)
+        params = request.get("params")
+        if not isinstance(params, dict):
+            return f"requests.{i}.params: Field required"
+        for name in ("model", "max_tokens", "messages"):
+            if name not in params:
+                return f"requests.{i}.params.{name}: Field required"
+    return None
+
+
+class _BatchHandler(BaseHTTPRequestHandler):
+    params: BatchParams
+    stats: ServerStats
+    batches: dict[str, _Batch]
+    lock: threading.Lock
+    rng: random.Random
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, data: object) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, error_type: str, message: str) -> None:
+        error = {"type": error_type, "message": message}
+        self._send_json(status, {"type": "error", "error": error})
+
+    def _base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _batch_json(self, batch: _Batch) -> dict:
+        ended = time.monotonic() >= batch.ready_at
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if ended:
+            for outcome in batch.outcomes:
+                counts[outcome] += 1
+        else:
+            counts["processing"] = len(batch.requests)
+        return {
+            "id": batch.id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": _iso(batch.created_at),
+            "expires_at": _iso(batch.created_at + timedelta(hours=24)),
+            "ended_at": _iso(datetime.now(timezone.utc)) if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": (
+                f"{self._base_url()}/v1/messages/batches/{batch.id}/results" if ended else None
+            ),
+        }
+
+    def _result(self, request: dict, outcome: str) -> dict:
+        if outcome == "errored":
+            error = {"type": "overloaded_error", "message": "Overloaded"}
+            result = {"type": "errored", "error": {"type": "error", "error": error}}
+        elif outcome == "expired":
+            result = {"type": "expired"}
+        else:
+            params = request["params"]
+            text, input_tokens = _placeholder(params)
+            result = {
+                "type": "succeeded",
+                "message": {
+                    "id": f"msg_{hashlib.sha256(request['custom_id'].encode()).hexdigest()[:24]}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": params["model"],
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {
+                        "input_tokens": input_tokens,
+                        "output_tokens": min(len(text) // 4, params["max_tokens"]),
+                        "cache_creation_input_tokens": 0,
+                        "cache_read_input_tokens": 0,
+                    },
+                },
+            }
+        return {"custom_id": request["custom_id"], "result": result}
+
+    def do_POST(self) -> None:
+        if self.path != "/v1/messages/batches":
+            self._send_error(404, "not_found_error", f"Not found: {self.path}")
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            body = None
+        problem = validate_requests(body)
+        if problem is not None:
+            with self.lock:
+                self.stats.rejected += 1
+            self._send_error(400, "invalid_request_error", problem)
+            return
+
+        requests = body["requests"]
+        with self.lock:
+            self.stats.batches += 1
+            self.stats.requests += len(requests)
+            batch = _Batch(
+                id=f"msgbatch_{self.params.seed:04d}{self.stats.batches:08d}",
+                requests=requests,
+                created_at=datetime.now(timezone.utc),
+                ready_at=time.monotonic() + self.params.processing_seconds,
+            )
+            for _ in requests:
+                roll = self.rng.random()
+                if roll < self.params.error_rate:
+                    outcome = "errored"
+                elif roll < self.params.error_rate + self.params.expire_rate:
+                    outcome = "expired"
+                else:
+                    outcome = "succeeded"
+                batch.outcomes.append(outcome)
+                setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+            self.batches[batch.id] = batch
+        self._send_json(200, self._batch_json(batch))
+
+    def do_GET(self) -> None:
+        match = _BATCH_PATH_RE.match(self.path.split("?")[0])
+        batch = self.batches.get(match.group(1)) if match else None
+        if batch is None:
+            self._send_error(404, "not_found_error", f"Not found: {self.path}")
+            return
+
+        if not match.group(2):
+            with self.lock:
+                self.stats.polls += 1
+            self._send_json(200, self._batch_json(batch))
+            return
+
+        if time.monotonic() < batch.ready_at:
+            self._send_error(400, "invalid_request_error", "Batch is still processing")
+            return
+        body = "".join(
+            json.dumps(self._result(request, outcome)) + "\n"
+            for request, outcome in zip(batch.requests, batch.outcomes)
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _BatchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(
+    params: BatchParams,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> _BatchServer:
+    """Create (but do not start) an HTTP server for the stand-in."""
+    handler = type("BatchHandler", (_BatchHandler,), {
+        "params": params,
+        "stats": ServerStats(),
+        "batches": {},
+        "lock": threading.Lock(),
+        "rng": random.Random(params.seed),
+    })
+    return _BatchServer((host, port), handler)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add a --flag for every BatchParams field."""
+    for name, default in vars(BatchParams()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a stand-in Message Batches API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8789, help="0 picks a free port")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    params = BatchParams(**{name: getattr(args, name) for name in vars(BatchParams())})
+    server = make_server(params, args.host, args.port)
+    print(f"Serving batch API at http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Server: {server.RequestHandlerClass.stats.summary()}", flush=True)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Run a backfill end to end against the synthetic forum and batch stand-in.
+
+Fills a scratch store with several days of the synthetic forum, then
+backfills those days into a scratch summary cache through the stand-in
+Message Batches API (benchmarks/batch_api.py): the first run submits
+notes and summaries, later runs find everything cached. Finally the
+newest day is summarized the live way, which must be served entirely
+from the cache (the stand-in has no /v1/messages endpoint).
+
+Arguments not recognised here are passed on to the forum, e.g.:
+
+    python benchmarks/bench_backfill.py --days 14 -- --topics 1000 --posts-per-topic 30
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from batch_api import BatchParams, make_server
+from bench_fetch import start_forum, stop_forum
+
+from nstr_report.backfill import backfill_async, stored_activity
+from nstr_report.fetcher import fetch_activity_async
+from nstr_report.sources import ForumSource
+from nstr_report.store import Store
+from nstr_report.summarizer import Summarizer, SummaryLimits
+from nstr_report.summarycache import SummaryCache
+
+
+async def run(args: argparse.Namespace, url: str, workdir: Path) -> None:
+    store = Store(workdir / "store.db")
+    cache = SummaryCache(workdir / "summaries")
+    sources = [ForumSource(url, lookback_hours=24)]
+    limits = SummaryLimits(max_prompt_tokens=args.max_prompt_tokens)
+    try:
+        started = time.monotonic()
+        await fetch_activity_async(url, args.days * 24 + 24, http_cache=False, store=store)
+        print(f"Stored {args.days} days in {time.monotonic() - started:.1f}s")
+
+        today = datetime.now(timezone.utc).date()
+        start = today - timedelta(days=args.days - 1)
+        for i in range(args.runs):
+            started = time.monotonic()
+            days = await backfill_async(
+                sources, store, start, today, "stand-in", cache, limits,
+                poll_seconds=args.poll_seconds,
+            )
+            print(f"Run {i + 1}: {time.monotonic() - started:6.2f}s, {days} days cached")
+
+        until = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
+        async with Summarizer("stand-in", limits) as summarizer:
+            await summarizer.summarize(stored_activity(sources, store, until), cache)
+        print(f"Live summary of {today} served from the cache")
+    finally:
+        store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--poll-seconds", type=float, default=0.5)
+    parser.add_argument("--processing-seconds", type=float, default=1.0)
+    parser.add_argument("--batch-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--max-prompt-tokens", type=int, default=SummaryLimits().max_prompt_tokens,
+        help="Lower to make more days map-reduce",
+    )
+    args, forum_args = parser.parse_known_args()
+    if forum_args[:1] == ["--"]:
+        forum_args = forum_args[1:]
+
+    batch_server = make_server(BatchParams(
+        processing_seconds=args.processing_seconds, error_rate=args.batch_error_rate,
+    ))
+    threading.Thread(target=batch_server.serve_forever, daemon=True).start()
+    # Read by the Anthropic client
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{batch_server.server_port}"
+
+    server, url = start_forum(["--span-hours", str(args.days * 24), *forum_args])
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            asyncio.run(run(args, url, Path(workdir)))
+    finally:
+        stop_forum(server)
+        batch_server.shutdown()
+        print(f"Batch API: {batch_server.RequestHandlerClass.stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
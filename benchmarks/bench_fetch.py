@@ -0,0 +1,127 @@
+"""Benchmark the fetch stage against the synthetic Discourse forum.
+
+Starts benchmarks/synthetic_forum.py in a subprocess (so the server does
+not compete with the fetcher for the GIL), then fetches it several times
+with one HTTP cache and, optionally, one store: the first run is cold and
+later runs revalidate with ETags and plan incremental fetches.
+
+Arguments not recognised here are passed on to the forum, e.g.:
+
+    python benchmarks/bench_fetch.py --runs 2 -- --topics 5000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from nstr_report.fetcher import (
+    CONTENT_COOKED,
+    CONTENT_FORMATS,
+    DEFAULT_MAX_CONCURRENCY,
+    FETCH_MODE_TOPICS,
+    FETCH_MODES,
+    fetch_activity_async,
+)
+from nstr_report.httpcache import HTTPCache
+from nstr_report.session import FetchSession
+from nstr_report.store import Store
+
+SERVING_PREFIX = "Serving synthetic forum at "
+
+
+def start_forum(forum_args: list[str]) -> tuple[subprocess.Popen, str]:
+    """Start the synthetic forum on a free port and return it with its URL."""
+    server = subprocess.Popen(
+        [sys.executable, str(Path(__file__).with_name("synthetic_forum.py")),
+         "--port", "0", *forum_args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    for line in server.stdout:
+        print(line, end="")
+        if line.startswith(SERVING_PREFIX):
+            return server, line[len(SERVING_PREFIX):].strip()
+    raise RuntimeError("Synthetic forum exited before serving")
+
+
+def stop_forum(server: subprocess.Popen) -> None:
+    """Interrupt the forum so it prints its request counters."""
+    server.send_signal(signal.SIGINT)
+    output, _ = server.communicate(timeout=10)
+    print(output, end="")
+
+
+def print_encodings(session: FetchSession) -> None:
+    """Break the session's logged transfers down by content coding."""
+    totals: dict[str, list[int]] = {}
+    for transfer in session.stats.transfers:
+        total = totals.setdefault(transfer.encoding, [0, 0, 0])
+        total[0] += 1
+        total[1] += transfer.wire_bytes
+        total[2] += transfer.decoded_bytes
+    for encoding, (count, wire, decoded) in sorted(totals.items()):
+        ratio = decoded / wire if wire else 0.0
+        print(
+            f"  {encoding:>8}: {count} responses, {wire / 1024:.0f} KiB on the wire, "
+            f"{decoded / 1024:.0f} KiB decoded ({ratio:.1f}x)"
+        )
+
+
+async def run(args: argparse.Namespace, url: str, workdir: Path) -> None:
+    cache = HTTPCache(workdir / "http")
+    store = Store(workdir / "store.db") if args.store else None
+    try:
+        for i in range(args.runs):
+            async with FetchSession(max_connections=args.concurrency, cache=cache) as session:
+                started = time.monotonic()
+                activity = await fetch_activity_async(
+                    url, args.lookback_hours, args.concurrency, session,
+                    mode=args.mode, store=store, content=args.content,
+                )
+                seconds = time.monotonic() - started
+
+            posts = sum(len(topic.posts) for topic in activity.topics)
+            incomplete = sum(not topic.complete for topic in activity.topics)
+            print(
+                f"Run {i + 1}: {seconds:6.2f}s, {len(activity.topics)} topics, "
+                f"{posts} posts, {incomplete} incomplete"
+            )
+            print(f"  HTTP: {session.stats.summary()}")
+            print_encodings(session)
+    finally:
+        if store is not None:
+            store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forum", help="URL of an already running forum to use instead")
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--lookback-hours", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--mode", choices=FETCH_MODES, default=FETCH_MODE_TOPICS)
+    parser.add_argument("--content", choices=CONTENT_FORMATS, default=CONTENT_COOKED)
+    parser.add_argument("--store", action="store_true", help="Sync into a scratch store")
+    args, forum_args = parser.parse_known_args()
+    if forum_args[:1] == ["--"]:
+        forum_args = forum_args[1:]
+
+    server = None
+    url = args.forum
+    if url is None:
+        server, url = start_forum(forum_args)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            asyncio.run(run(args, url, Path(workdir)))
+    finally:
+        if server is not None:
+            stop_forum(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark html_to_text against the previous regex implementation.
+
+Run with: python benchmarks/bench_html.py
+"""
+
+import random
+import re
+import timeit
+from html import unescape
+
+from nstr_report.text import html_to_text
+
+
+def html_to_text_regex(html: str) -> str:
+    """The previous three-regex implementation, kept for comparison."""
+    text = re.sub(r'<img[^>]*alt="([^"]*)"[^>]*>', r'[\1]', html)
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = unescape(text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def make_post(rng: random.Random, log_lines: int) -> str:
+    """Build a cooked post shaped like a BNOC report."""
+    parts = [
+        "<p>Seeing a burst of inbound connections on <code>:8333</code> from "
+        "the ranges below &mdash; anyone else?</p>",
+        '<aside class="quote no-group" data-username="b10c"><div class="title">'
+        "b10c:</div><blockquote><p>Our I2P peers dropped to zero at 03:00 UTC.</p>"
+        "</blockquote></aside>",
+    ]
+    log = "\n".join(
+        f"2026-02-12T03:{i % 60:02d}:{rng.randrange(60):02d}Z [net] "
+        f"peer={rng.randrange(100000)} addr={rng.randrange(256)}.{rng.randrange(256)}."
+        f"{rng.randrange(256)}.{rng.randrange(256)}:8333 &lt;disconnect&gt; "
+        f"{rng.randbytes(16).hex()}"
+        for i in range(log_lines)
+    )
+    parts.append(f'<pre><code class="lang-plaintext">{log}</code></pre>')
+    parts.append(
+        '<p><div class="lightbox-wrapper"><img src="/uploads/graph.png" '
+        'alt="peer count graph" width="690" height="388"></div></p>'
+    )
+    parts.append("<ul>" + "".join(f"<li>item {i} &amp; more</li>" for i in range(20)) + "</ul>")
+    return "\n".join(parts)
+
+
+def main() -> None:
+    rng = random.Random(1)
+    corpus = [make_post(rng, rng.choice([5, 50, 200, 1000])) for _ in range(50)]
+    size = sum(len(post) for post in corpus)
+    print(f"Corpus: {len(corpus)} posts, {size / 1024:.0f} KiB of cooked HTML")
+
+    for name, func in (("regex", html_to_text_regex), ("single-pass", html_to_text)):
+        runs = 5
+        seconds = min(timeit.repeat(lambda: [func(p) for p in corpus], number=1, repeat=runs))
+        print(f"{name:>12}: {seconds * 1000:8.1f} ms  ({size / seconds / 1e6:6.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
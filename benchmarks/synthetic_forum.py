@@ -0,0 +1,423 @@
+"""A synthetic Discourse forum for load-testing the fetcher.
+
+Serves the endpoints nstr-report reads (latest.json pages, topic views,
+/t/{id}/posts.json batches and the /posts.json feed) from data generated
+deterministically from a seed, with ETags, 304s, zstd/br/gzip compression,
+injected latency, 429s and 500s. Post bodies are only generated when
+requested, so forums with thousands of long topics start instantly.
+
+Run with: python benchmarks/synthetic_forum.py --topics 5000 --port 8788
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+LATEST_PAGE_SIZE = 30  # Topics per latest.json page, as in Discourse
+CHUNK_SIZE = 20  # Posts embedded in a topic view
+POSTS_FEED_SIZE = 50  # Posts per /posts.json page
+
+# Post IDs are <seconds since the forum's epoch> * TOPIC_ID_SPACE + topic ID,
+# so they increase with time (as in Discourse) and can be decoded
+TOPIC_ID_SPACE = 1 << 20
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    """Content codings this server can produce."""
+    compressors = {"gzip": lambda body: gzip.compress(body, compresslevel=6)}
+    try:
+        import brotli
+        compressors["br"] = lambda body: brotli.compress(body, quality=5)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        # Compressor objects are not thread-safe; make one per response
+        compressors["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+    except ImportError:
+        pass
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+WORDS = (
+    "peer node block relay mempool fee inbound outbound connection banned "
+    "addr version tor i2p cjdns asn eclipse spam orphan reorg header compact "
+    "filter stale tip latency bandwidth upgrade release patch log graph "
+    "monitor alert the a of and to in is we see from on at with"
+).split()
+
+
+@dataclass
+class ForumParams:
+    """Shape of the generated forum and of its misbehaviour."""
+
+    seed: int = 1
+    topics: int = 500
+    posts_per_topic: float = 10.0  # Mean; counts are exponentially distributed
+    max_posts_per_topic: int = 300
+    body_bytes: int = 800  # Approximate size of each post's cooked HTML
+    span_hours: float = 72.0  # Topics' last posts are spread over this window
+    users: int = 200
+    bumped_rate: float = 0.05  # Topics bumped after their last post (edits)
+    latency: float = 0.0  # Mean response delay in seconds (exponential)
+    slow_rate: float = 0.0  # Requests that stall for slow_latency instead
+    slow_latency: float = 5.0
+    throttle_rate: float = 0.0  # Requests answered with 429
+    retry_after: int = 1
+    error_rate: float = 0.0  # Requests answered with 500
+    encodings: str = "zstd,br,gzip"  # Preferred content codings; "" disables
+
+
+@dataclass
+class ServerStats:
+    """Counters for the responses the forum has sent."""
+
+    requests: int = 0
+    by_endpoint: dict[str, int] = field(default_factory=dict)
+    not_modified: int = 0
+    throttled: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+
+    def summary(self) -> str:
+        endpoints = ", ".join(f"{k} {v}" for k, v in sorted(self.by_endpoint.items()))
+        return (
+            f"{self.requests} requests ({endpoints}), {self.not_modified} not modified, "
+            f"{self.throttled} throttled, {self.errors} errors, "
+            f"{self.bytes_sent / 1024:.0f} KiB sent"
+        )
+
+
+@dataclass
+class _Topic:
+    id: int
+    title: str
+    slug: str
+    author: int  # User number of the original poster
+    tags: list[str]
+    post_times: list[int]  # Epoch seconds, one per post_number
+    bumped_at: int
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class SyntheticForum:
+    """Deterministic forum data generated from ForumParams.
+
+    Topic metadata and post times are generated up front; post bodies are
+    derived from (seed, topic, post number) when served. now is fixed at
+    construction so repeated requests return identical bodies and ETags.
+    """
+
+    def __init__(self, params: ForumParams, now: int | None = None):
+        self.params = params
+        self.now = now if now is not None else int(time.time())
+        self.epoch = self.now - int(params.span_hours * 3600) - 365 * 86400
+        self.topics: dict[int, _Topic] = {}
+
+        rng = random.Random(params.seed)
+        post_ids = []
+        for topic_id in range(1, params.topics + 1):
+            count = min(
+                params.max_posts_per_topic,
+                1 + int(rng.expovariate(1 / max(params.posts_per_topic - 1, 1e-9))),
+            )
+            last = self.now - int(rng.uniform(0, params.span_hours * 3600))
+            # Posts arrive a few minutes to a few hours apart
+            times = [last]
+            for _ in range(count - 1):
+                times.append(times[-1] - int(rng.expovariate(1 / 1800)) - 1)
+            times.reverse()
+
+            bumped = last
+            if rng.random() < params.bumped_rate:
+                bumped = min(self.now, last + int(rng.uniform(3600, 3 * 86400)))
+
+            words = rng.sample(WORDS[:30], 4)
+            self.topics[topic_id] = _Topic(
+                id=topic_id,
+                title=" ".join(words).capitalize(),
+                slug="-".join(words),
+                author=rng.randrange(params.users),
+                tags=rng.sample(["p2p", "mempool", "mining", "releases", "incidents"], 2),
+                post_times=times,
+                bumped_at=bumped,
+            )
+            post_ids.extend(self._post_id(topic_id, ts) for ts in times)
+
+        self.post_ids = sorted(post_ids)
+        self.latest = sorted(self.topics.values(), key=lambda t: t.bumped_at, reverse=True)
+
+    def _post_id(self, topic_id: int, ts: int) -> int:
+        return (ts - self.epoch) * TOPIC_ID_SPACE + topic_id
+
+    def _decode_post_id(self, post_id: int) -> tuple[_Topic, int] | None:
+        """Map a post ID back to its topic and post number."""
+        topic = self.topics.get(post_id % TOPIC_ID_SPACE)
+        if topic is None:
+            return None
+        ts = post_id // TOPIC_ID_SPACE + self.epoch
+        index = bisect_left(topic.post_times, ts)
+        if index == len(topic.post_times) or topic.post_times[index] != ts:
+            return None
+        return topic, index + 1
+
+    def _username(self, user: int) -> str:
+        return f"user{user}"
+
+    def post(self, topic: _Topic, post_number: int, raw: bool = False) -> dict:
+        """Build a post object, generating its body from the seed."""
+        rng = random.Random(f"{self.params.seed}:{topic.id}:{post_number}")
+        author = topic.author if post_number == 1 else rng.randrange(self.params.users)
+
+        paragraphs, size = [], 0
+        while size < self.params.body_bytes:
+            sentence = " ".join(rng.choices(WORDS, k=rng.randint(8, 30)))
+            paragraph = f"<p>{sentence.capitalize()} &amp; <code>{rng.randbytes(4).hex()}</code>.</p>"
+            paragraphs.append(paragraph)
+            size += len(paragraph)
+
+        ts = topic.post_times[post_number - 1]
+        data = {
+            "id": self._post_id(topic.id, ts),
+            "username": self._username(author),
+            "created_at": _iso(ts),
+            "post_number": post_number,
+            "post_type": 1,
+            "cooked": "\n".join(paragraphs),
+            "topic_id": topic.id,
+            "topic_slug": topic.slug,
+            "topic_title": topic.title,
+        }
+        if raw:
+            data["raw"] = re.sub(r"<[^>]+>", "", data["cooked"]).replace("&amp;", "&")
+        return data
+
+    def topic_summary(self, topic: _Topic) -> dict:
+        """A topic entry as listed in latest.json."""
+        return {
+            "id": topic.id,
+            "title": topic.title,
+            "slug": topic.slug,
+            "posts_count": len(topic.post_times),
+            "highest_post_number": len(topic.post_times),
+            "created_at": _iso(topic.post_times[0]),
+            "last_posted_at": _iso(topic.post_times[-1]),
+            "bumped_at": _iso(topic.bumped_at),
+            "pinned": False,
+            "tags": topic.tags,
+            "posters": [{"user_id": topic.author, "description": "Original Poster"}],
+        }
+
+    def latest_page(self, page: int) -> dict:
+        topics = self.latest[page * LATEST_PAGE_SIZE:(page + 1) * LATEST_PAGE_SIZE]
+        topic_list = {"topics": [self.topic_summary(t) for t in topics]}
+        if (page + 1) * LATEST_PAGE_SIZE < len(self.latest):
+            topic_list["more_topics_url"] = f"/latest?no_definitions=true&page={page + 1}"
+        users = {t.author for t in topics}
+        return {
+            "users": [{"id": u, "username": self._username(u)} for u in sorted(users)],
+            "topic_list": topic_list,
+        }
+
+    def topic_view(self, topic: _Topic, from_post_number: int = 1, raw: bool = False) -> dict:
+        start = max(1, min(from_post_number, len(topic.post_times)))
+        numbers = range(start, min(start + CHUNK_SIZE, len(topic.post_times) + 1))
+        data = self.topic_summary(topic)
+        data["details"] = {"created_by": {"username": self._username(topic.author)}}
+        data["post_stream"] = {
+            "posts": [self.post(topic, n, raw) for n in numbers],
+            "stream": [self._post_id(topic.id, ts) for ts in topic.post_times],
+        }
+        return data
+
+    def posts_by_id(self, topic: _Topic, post_ids: list[int], raw: bool = False) -> dict:
+        posts = []
+        for post_id in post_ids:
+            decoded = self._decode_post_id(post_id)
+            if decoded is not None and decoded[0] is topic:
+                posts.append(self.post(topic, decoded[1], raw))
+        return {"post_stream": {"posts": posts}}
+
+    def latest_posts(self, before: int | None = None) -> dict:
+        end = len(self.post_ids) if before is None else bisect_left(self.post_ids, before)
+        posts = []
+        for post_id in reversed(self.post_ids[max(0, end - POSTS_FEED_SIZE):end]):
+            topic, post_number = self._decode_post_id(post_id)
+            posts.append(self.post(topic, post_number))
+        return {"latest_posts": posts}
+
+
+_TOPIC_VIEW_RE = re.compile(r"^/t/(?:[^/]+/)?(\d+)(?:/(\d+))?\.json$")
+_POSTS_RE = re.compile(r"^/t/(\d+)/posts\.json$")
+
+
+class _ForumHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    forum: SyntheticForum  # Set on the per-server subclass
+    stats: ServerStats
+    lock: threading.Lock
+    rng: random.Random
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.lock:
+            self.stats.bytes_sent += len(body)
+
+    def _route(
+        self, path: str, query: dict[str, list[str]]
+    ) -> tuple[str, Callable[[], dict] | None]:
+        """Return the endpoint name and a builder for its response body."""
+        forum = self.forum
+        raw = query.get("include_raw") == ["1"]
+        if path in ("/latest.json", "/latest"):
+            page = int(query.get("page", ["0"])[0])
+            return "latest", lambda: forum.latest_page(page)
+        if path == "/posts.json":
+            before = int(query["before"][0]) if "before" in query else None
+            return "posts", lambda: forum.latest_posts(before)
+        match = _POSTS_RE.match(path)
+        if match:
+            topic = forum.topics.get(int(match.group(1)))
+            post_ids = [int(p) for p in query.get("post_ids[]", [])]
+            return "batch", topic and (lambda: forum.posts_by_id(topic, post_ids, raw))
+        match = _TOPIC_VIEW_RE.match(path)
+        if match:
+            topic = forum.topics.get(int(match.group(1)))
+            start = int(match.group(2) or 1)
+            return "topic", topic and (lambda: forum.topic_view(topic, start, raw))
+        return "other", None
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = self.forum.params
+        with self.lock:
+            roll = self.rng.random()
+            delay = (
+                params.slow_latency if self.rng.random() < params.slow_rate
+                else self.rng.expovariate(1 / params.latency) if params.latency else 0.0
+            )
+
+        endpoint, build = self._route(url.path, parse_qs(url.query))
+        with self.lock:
+            self.stats.requests += 1
+            self.stats.by_endpoint[endpoint] = self.stats.by_endpoint.get(endpoint, 0) + 1
+
+        if delay:
+            time.sleep(delay)
+
+        if roll < params.throttle_rate:
+            with self.lock:
+                self.stats.throttled += 1
+            self._send(429, headers={"Retry-After": str(params.retry_after)})
+            return
+        if roll < params.throttle_rate + params.error_rate:
+            with self.lock:
+                self.stats.errors += 1
+            self._send(500, b"synthetic error")
+            return
+        if build is None:
+            self._send(404, b"not found")
+            return
+
+        body = json.dumps(build()).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.lock:
+                self.stats.not_modified += 1
+            self._send(304, headers={"ETag": etag})
+            return
+
+        headers = {"Content-Type": "application/json", "ETag": etag, "Vary": "Accept-Encoding"}
+        accepted = {e.split(";")[0].strip() for e in self.headers.get("Accept-Encoding", "").split(",")}
+        for encoding in params.encodings.split(","):
+            if encoding in accepted and encoding in COMPRESSORS:
+                body = COMPRESSORS[encoding](body)
+                headers["Content-Encoding"] = encoding
+                break
+        self._send(200, body, headers)
+
+
+class _ForumServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients hang up on hedged and abandoned requests mid-response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(
+    forum: SyntheticForum,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> _ForumServer:
+    """Create (but do not start) an HTTP server for forum."""
+    handler = type("ForumHandler", (_ForumHandler,), {
+        "forum": forum,
+        "stats": ServerStats(),
+        "lock": threading.Lock(),
+        "rng": random.Random(forum.params.seed),
+    })
+    return _ForumServer((host, port), handler)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add a --flag for every ForumParams field."""
+    for name, default in vars(ForumParams()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a synthetic Discourse forum")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8788, help="0 picks a free port")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    params = ForumParams(**{name: getattr(args, name) for name in vars(ForumParams())})
+    started = time.monotonic()
+    forum = SyntheticForum(params)
+    posts = len(forum.post_ids)
+    server = make_server(forum, args.host, args.port)
+    print(
+        f"Generated {params.topics} topics, {posts} posts in "
+        f"{time.monotonic() - started:.1f}s", flush=True,
+    )
+    # Read by bench_fetch.py to find the port
+    print(f"Serving synthetic forum at http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Server: {server.RequestHandlerClass.stats.summary()}", flush=True)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -26,7 +26,7 @@ echo "Using Python $PYTHON_VERSION"
 
 # Install the package
 echo "Installing nstr-report..."
-pip install --user -e "$SCRIPT_DIR"
+pip install --user -e "$SCRIPT_DIR[compression]"
 
 # Verify installation
 if ! command -v nstr-report &> /dev/null; then
@@ -42,6 +42,8 @@ mkdir -p "$SYSTEMD_USER_DIR"
 echo "Installing systemd units..."
 cp "$SCRIPT_DIR/systemd/nstr-report.service" "$SYSTEMD_USER_DIR/"
 cp "$SCRIPT_DIR/systemd/nstr-report.timer" "$SYSTEMD_USER_DIR/"
+cp "$SCRIPT_DIR/systemd/nstr-report-webhook.service" "$SYSTEMD_USER_DIR/"
+cp "$SCRIPT_DIR/systemd/nstr-report-watch.service" "$SYSTEMD_USER_DIR/"
 
 # Reload systemd
 systemctl --user daemon-reload
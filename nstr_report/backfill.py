@@ -0,0 +1,270 @@
+"""Regenerate past days' summaries in bulk with the Message Batches API."""
+
+import asyncio
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta, timezone
+from typing import TYPE_CHECKING
+
+import anthropic
+
+from .fetcher import Activity, Topic, filter_tags
+from .sources import ForumSource
+from .summarizer import (
+    NOTES_MAX_TOKENS,
+    SUMMARY_MAX_TOKENS,
+    SummaryLimits,
+    SummaryPlan,
+    Usage,
+    message_params,
+    notes_requests,
+    plan_summary,
+    summary_request,
+)
+from .summarycache import SummaryCache
+
+if TYPE_CHECKING:
+    from .store import Store
+
+# Batches finish within 24 hours, usually much sooner
+BATCH_POLL_SECONDS = 30.0
+
+# Requests per batch; the API allows up to 100,000 or 256 MB per batch
+MAX_BATCH_REQUESTS = 10_000
+MAX_BATCH_BYTES = 128 * 1024 * 1024
+
+# Submissions of requests that errored or expired, the first included
+MAX_BATCH_ROUNDS = 3
+
+
+def report_times(start: date, end: date, report_at: time) -> list[datetime]:
+    """Report times on each date from start to end inclusive, up to now."""
+    now = datetime.now(timezone.utc)
+    times = []
+    day = start
+    while day <= end:
+        when = datetime.combine(day, report_at)
+        if when > now:
+            break
+        times.append(when)
+        day += timedelta(days=1)
+    return times
+
+
+def stored_activity(sources: list[ForumSource], store: "Store", until: datetime) -> Activity:
+    """Rebuild from the store the Activity a report at until would have used.
+
+    Each source contributes its own lookback window ending at until, as
+    in an --offline run at that time, so prompts and summary cache keys
+    match the ones a live report builds.
+    """
+    topics: dict[tuple[str, int], Topic] = {}
+    for source in sources:
+        since = until - timedelta(hours=source.lookback_hours)
+        activity = store.build_activity(source.url, since, until)
+        for topic in filter_tags(activity.topics, source.tags):
+            topics.setdefault((topic.source_url, topic.id), topic)
+
+    return Activity(
+        topics=sorted(topics.values(), key=lambda t: t.bumped_ts, reverse=True),
+        fetched_at=until,
+        source_url=", ".join(dict.fromkeys(source.url for source in sources)),
+    )
+
+
+def _batches(requests: dict[str, dict]) -> Iterator[list[dict]]:
+    """Group requests into batches within MAX_BATCH_REQUESTS and MAX_BATCH_BYTES."""
+    batch: list[dict] = []
+    size = 0
+    for custom_id, params in requests.items():
+        # Prompts dominate the request size
+        request_size = len(params["messages"][0]["content"].encode()) + 1024
+        if batch and (len(batch) == MAX_BATCH_REQUESTS or size + request_size > MAX_BATCH_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append({"custom_id": custom_id, "params": params})
+        size += request_size
+    if batch:
+        yield batch
+
+
+async def _run_round(
+    client: anthropic.AsyncAnthropic,
+    requests: dict[str, dict],
+    usage: Usage,
+    poll_seconds: float,
+) -> dict[str, str]:
+    batch_ids = []
+    for batch in _batches(requests):
+        created = await client.messages.batches.create(requests=batch)
+        print(f"Submitted batch {created.id} ({len(batch)} requests)")
+        batch_ids.append(created.id)
+
+    results: dict[str, str] = {}
+    for batch_id in batch_ids:
+        while True:
+            batch = await client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == "ended":
+                break
+            counts = batch.request_counts
+            print(f"Batch {batch_id}: {batch.processing_status}, {counts.processing} processing")
+            await asyncio.sleep(poll_seconds)
+
+        failures: dict[str, int] = {}
+        async for item in await client.messages.batches.results(batch_id):
+            if item.result.type == "succeeded":
+                message = item.result.message
+                usage.add(message.usage)
+                results[item.custom_id] = message.content[0].text.strip()
+            else:
+                failures[item.result.type] = failures.get(item.result.type, 0) + 1
+        failed = ", ".join(f"{count} {kind}" for kind, count in failures.items())
+        print(f"Batch {batch_id} ended{f' ({failed})' if failed else ''}")
+    return results
+
+
+async def run_batches(
+    client: anthropic.AsyncAnthropic,
+    requests: dict[str, dict],
+    usage: Usage,
+    poll_seconds: float = BATCH_POLL_SECONDS,
+) -> dict[str, str]:
+    """Submit requests as Message Batches and wait for their results.
+
+    All batches of a round are submitted before polling starts, so they
+    are processed concurrently. Errored and expired requests are
+    resubmitted, for up to MAX_BATCH_ROUNDS rounds in all.
+
+    Args:
+        client: Anthropic client
+        requests: Message parameters by custom_id (at most 64 characters
+            of letters, digits, "-" and "_")
+        usage: Receives the token counts of succeeded requests
+        poll_seconds: Interval between status checks
+
+    Returns:
+        The text of each succeeded request by custom_id; requests that
+        failed in every round are left out.
+    """
+    results: dict[str, str] = {}
+    pending = dict(requests)
+    for round_number in range(MAX_BATCH_ROUNDS):
+        if not pending:
+            break
+        if round_number:
+            print(f"Resubmitting {len(pending)} failed requests")
+        results.update(await _run_round(client, pending, usage, poll_seconds))
+        pending = {key: params for key, params in pending.items() if key not in results}
+    return results
+
+
+async def backfill_async(
+    sources: list[ForumSource],
+    store: "Store",
+    start: date,
+    end: date,
+    api_key: str,
+    cache: SummaryCache,
+    limits: SummaryLimits | None = None,
+    report_at: time = time(0, 0, tzinfo=timezone.utc),
+    poll_seconds: float = BATCH_POLL_SECONDS,
+) -> int:
+    """Summarize each day from start to end through the Message Batches API.
+
+    For every date, the activity a report at report_at would have
+    summarized is rebuilt from the store and planned as for a live
+    summary. Map requests for all days go out in one round of batches,
+    then the final summaries in another; every result is written to the
+    summary cache under the key a live run computes, so later reports
+    and dry runs of those days need no requests. Requests whose result
+    is already cached are not sent, and notes shared by several days
+    are requested once.
+
+    Args:
+        sources: Forums and feeds whose stored activity to summarize
+        store: Local store holding the days' posts
+        start: First date to summarize
+        end: Last date to summarize (inclusive)
+        api_key: Anthropic API key
+        cache: Summary cache to read and fill
+        limits: Size bounds for planning (defaults if not given)
+        report_at: Time of day (UTC) whose report each date stands for
+        poll_seconds: Interval between batch status checks
+
+    Returns:
+        Number of days whose summary is now cached
+    """
+    limits = limits or SummaryLimits()
+    plans: dict[date, SummaryPlan] = {}
+    for until in report_times(start, end, report_at):
+        activity = stored_activity(sources, store, until)
+        if any(topic.posts for topic in activity.topics):
+            plan = plans[until.date()] = plan_summary(activity, limits, cache_notes=True)
+            omissions = plan.omissions()
+            if omissions:
+                print(f"Warning: {until:%Y-%m-%d}: {omissions}")
+        else:
+            print(f"{until:%Y-%m-%d}: no activity")
+
+    client = anthropic.AsyncAnthropic(api_key=api_key)
+    usage = Usage()
+    try:
+        # Map requests of the busy days
+        requests = {
+            key: message_params(prompt, NOTES_MAX_TOKENS)
+            for plan in plans.values()
+            for key, prompt in notes_requests(plan)
+            if cache.get(key) is None
+        }
+        print(f"Backfill: {len(plans)} days, {len(requests)} notes to generate")
+        for key, text in (await run_batches(client, requests, usage, poll_seconds)).items():
+            cache.put(key, text)
+        cache.save()
+
+        # Final summaries of every day whose notes are all available
+        summaries: dict[date, str] = {}
+        requests = {}
+        reused = 0
+        for day, plan in plans.items():
+            part_notes = [cache.get(key) for key, _ in notes_requests(plan)]
+            if None in part_notes:
+                print(f"Warning: {day}: notes incomplete, not summarized")
+                continue
+            key, prompt = summary_request(plan, part_notes)
+            summaries[day] = key
+            if cache.get(key) is None:
+                requests[key] = message_params(prompt, SUMMARY_MAX_TOKENS)
+            else:
+                reused += 1
+        print(f"Backfill: {len(requests)} summaries to generate, {reused} already cached")
+        results = await run_batches(client, requests, usage, poll_seconds)
+        for key, text in results.items():
+            cache.put(key, text)
+        cache.save()
+    finally:
+        await client.close()
+        if usage.requests:
+            print(f"Claude usage: {usage.summary()}")
+
+    failed = [day for day, key in summaries.items() if key in requests and key not in results]
+    for day in failed:
+        print(f"Warning: {day}: summary request failed")
+    return len(summaries) - len(failed)
+
+
+def backfill(
+    sources: list[ForumSource],
+    store: "Store",
+    start: date,
+    end: date,
+    api_key: str,
+    cache: SummaryCache,
+    limits: SummaryLimits | None = None,
+    report_at: time = time(0, 0, tzinfo=timezone.utc),
+    poll_seconds: float = BATCH_POLL_SECONDS,
+) -> int:
+    """Synchronous wrapper for backfill_async."""
+    return asyncio.run(
+        backfill_async(
+            sources, store, start, end, api_key, cache, limits, report_at, poll_seconds
+        )
+    )
@@ -0,0 +1,218 @@
+"""Record and replay the fetch stage's HTTP traffic."""
+
+import asyncio
+import base64
+import gzip
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import httpx
+
+CASSETTE_FILE = "cassette.jsonl.gz"
+
+
+@dataclass
+class Interaction:
+    """One recorded request and its response."""
+
+    method: str
+    url: str
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes  # As sent on the wire (still content-encoded)
+    elapsed: float  # Seconds until the full body was received
+
+    def to_json(self) -> dict:
+        return {
+            "method": self.method,
+            "url": self.url,
+            "status": self.status,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode(),
+            "elapsed": self.elapsed,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Interaction":
+        return cls(
+            method=data["method"],
+            url=data["url"],
+            status=data["status"],
+            headers=[tuple(header) for header in data["headers"]],
+            body=base64.b64decode(data["body"]),
+            elapsed=data["elapsed"],
+        )
+
+
+class Cassette:
+    """A directory holding the gzipped interactions of one fetch run.
+
+    Recording wraps the real transport and saves every exchange when the
+    session closes; replaying serves them back without any network. The
+    time of the recording is saved with it, and a replay runs at that
+    time (see now), so lookback windows select the same topics however
+    much later the cassette is replayed.
+    """
+
+    def __init__(self, path: Path, replay: bool = False, latency: bool = False):
+        self.path = path
+        self.replay = replay
+        self.latency = latency  # Replay with the recorded response times
+        self.recorded_at: datetime | None = None
+
+    def now(self) -> datetime:
+        """The current time, or the time of the recording when replaying.
+
+        While recording, the first call fixes the time saved with the
+        recording.
+        """
+        if self.replay and self.recorded_at is not None:
+            return self.recorded_at
+        now = datetime.now(timezone.utc)
+        if not self.replay and self.recorded_at is None:
+            self.recorded_at = now
+        return now
+
+    @property
+    def realtime(self) -> bool:
+        """Whether responses arrive with real-world timing."""
+        return not self.replay or self.latency
+
+    @property
+    def file(self) -> Path:
+        return self.path / CASSETTE_FILE
+
+    def load(self) -> list[Interaction]:
+        """Read all recorded interactions and the time of the recording."""
+        interactions = []
+        with gzip.open(self.file, "rt") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if "recorded_at" in data:
+                    self.recorded_at = datetime.fromisoformat(data["recorded_at"])
+                else:
+                    interactions.append(Interaction.from_json(data))
+
+        if self.recorded_at is None:
+            # Recorded before the time was saved; the newest Date header is
+            # within the fetch stage's duration of it
+            self.recorded_at = _latest_date(interactions)
+            if self.recorded_at is None:
+                print(f"Warning: {self.file} has no recording time, replaying at the current time")
+        return interactions
+
+    def save(self, interactions: list[Interaction]) -> None:
+        """Write interactions, replacing any earlier recording."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        recorded_at = self.recorded_at or self.now()
+        tmp = self.file.with_suffix(".tmp")
+        with gzip.open(tmp, "wt") as f:
+            f.write(json.dumps({"recorded_at": recorded_at.isoformat()}) + "\n")
+            for interaction in interactions:
+                f.write(json.dumps(interaction.to_json()) + "\n")
+        tmp.replace(self.file)
+
+    def transport(self, inner: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        """Wrap the real transport for recording, or replace it for replay."""
+        if self.replay:
+            return ReplayTransport(self)
+        return RecordingTransport(self, inner)
+
+
+def _latest_date(interactions: list[Interaction]) -> datetime | None:
+    """The newest Date response header among interactions."""
+    latest = None
+    for interaction in interactions:
+        for name, value in interaction.headers:
+            if name.lower() != "date":
+                continue
+            try:
+                when = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                continue
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            if latest is None or when > latest:
+                latest = when
+    return latest
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through, keeping a copy of every response."""
+
+    def __init__(self, cassette: Cassette, inner: httpx.AsyncBaseTransport):
+        self.cassette = cassette
+        self.inner = inner
+        self.interactions: list[Interaction] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        response = await self.inner.handle_async_request(request)
+        try:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+
+        self.interactions.append(Interaction(
+            method=request.method,
+            url=str(request.url),
+            status=response.status_code,
+            headers=list(response.headers.multi_items()),
+            body=body,
+            elapsed=time.monotonic() - start,
+        ))
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(body),
+            request=request,
+            extensions={"http_version": response.extensions.get("http_version", b"HTTP/1.1")},
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        self.cassette.save(self.interactions)
+        print(f"Recorded {len(self.interactions)} requests to {self.cassette.file}")
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serves recorded responses, matched by method and URL.
+
+    Repeated requests for the same URL get its recorded responses in order,
+    then the last one again. Requests that were never recorded get a 504.
+    """
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self.queues: dict[tuple[str, str], deque[Interaction]] = {}
+        self.last: dict[tuple[str, str], Interaction] = {}
+        for interaction in cassette.load():
+            key = (interaction.method, interaction.url)
+            self.queues.setdefault(key, deque()).append(interaction)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = (request.method, str(request.url))
+        queue = self.queues.get(key)
+        if queue:
+            self.last[key] = queue.popleft()
+        interaction = self.last.get(key)
+
+        if interaction is None:
+            print(f"Warning: No recorded response for {request.method} {request.url}")
+            return httpx.Response(504, content=b"not recorded", request=request)
+
+        if self.cassette.latency:
+            await asyncio.sleep(interaction.elapsed)
+        return httpx.Response(
+            interaction.status,
+            headers=interaction.headers,
+            stream=httpx.ByteStream(interaction.body),
+            request=request,
+        )
@@ -4,10 +4,13 @@ import json
 import os
 import secrets
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, fields
 
 from nostr_sdk import SecretKey
 
+from .sources import SOURCE_DISCOURSE, ForumSource
+from .summarizer import SummaryLimits
+
 CONFIG_PATH = Path.home() / ".nstr-report"
 
 
@@ -37,6 +40,39 @@ DEFAULT_RELAYS = [
 
 DEFAULT_SOURCE_URL = "https://bnoc.xyz"
 DEFAULT_LOOKBACK_HOURS = 24
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_FETCH_MODE = "topics"  # "topics" (per-topic) or "posts" (posts feed)
+DEFAULT_CONTENT_FORMAT = "cooked"  # "cooked" (HTML) or "raw" (markdown)
+DEFAULT_FETCH_BUDGET_SECONDS = 300  # Upper bound on the whole fetch stage
+DEFAULT_WEBHOOK_HOST = "127.0.0.1"
+DEFAULT_WEBHOOK_PORT = 8787
+DEFAULT_REPORT_TIME = "00:00"  # UTC, when --watch publishes the summary
+
+
+def default_sources() -> list[ForumSource]:
+    """Return the default forum list (bnoc.xyz only)."""
+    return [ForumSource(DEFAULT_SOURCE_URL, DEFAULT_LOOKBACK_HOURS)]
+
+
+def parse_sources(source: dict | list | str) -> list[ForumSource]:
+    """Parse the "source" config section into forums.
+
+    Accepts a single forum object (the original format), a URL string, or
+    a list of either. Forum objects take "url", "lookback_hours", "tags"
+    and "kind" ("discourse", or "feed" for an RSS/Atom feed URL) keys.
+    """
+    entries = source if isinstance(source, list) else [source]
+    sources = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        sources.append(ForumSource(
+            url=entry.get("url", DEFAULT_SOURCE_URL).rstrip("/"),
+            lookback_hours=entry.get("lookback_hours", DEFAULT_LOOKBACK_HOURS),
+            tags=tuple(entry.get("tags", ())),
+            kind=entry.get("kind", SOURCE_DISCOURSE),
+        ))
+    return sources or default_sources()
 
 
 @dataclass
@@ -44,9 +80,20 @@ class Config:
     """Configuration for nstr-report."""
 
     relays: list[str] = field(default_factory=lambda: DEFAULT_RELAYS.copy())
-    source_url: str = DEFAULT_SOURCE_URL
-    lookback_hours: int = DEFAULT_LOOKBACK_HOURS
+    sources: list[ForumSource] = field(default_factory=default_sources)
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY  # Topic fetches in flight per forum
+    fetch_mode: str = DEFAULT_FETCH_MODE
+    content_format: str = DEFAULT_CONTENT_FORMAT
+    fetch_budget_seconds: float = DEFAULT_FETCH_BUDGET_SECONDS
+    store_enabled: bool = True  # Mirror topics/posts locally for incremental sync
+    summary_cache_enabled: bool = True  # Reuse notes and summaries of unchanged content
+    # Discourse webhook receiver (--serve-webhooks)
+    webhook_secret: str | None = None
+    webhook_host: str = DEFAULT_WEBHOOK_HOST
+    webhook_port: int = DEFAULT_WEBHOOK_PORT
+    report_time: str = DEFAULT_REPORT_TIME
     anthropic_api_key: str | None = None
+    summary_limits: SummaryLimits = field(default_factory=SummaryLimits)
     # Local signing (used if bunker_uri not set)
     private_key_hex: str | None = None
     # Remote signing via NIP-46
@@ -60,9 +107,20 @@ class Config:
             "relays": {
                 "urls": self.relays,
             },
-            "source": {
-                "url": self.source_url,
-                "lookback_hours": self.lookback_hours,
+            "source": [
+                {
+                    "url": source.url,
+                    "lookback_hours": source.lookback_hours,
+                    "tags": list(source.tags),
+                    "kind": source.kind,
+                }
+                for source in self.sources
+            ],
+            "fetch": {
+                "max_concurrency": self.max_concurrency,
+                "mode": self.fetch_mode,
+                "content": self.content_format,
+                "fetch_budget_seconds": self.fetch_budget_seconds,
             },
         }
 
@@ -73,6 +131,18 @@ class Config:
         elif self.private_key_hex:
             data["nostr"]["private_key_hex"] = self.private_key_hex
 
+        data["store"] = {"enabled": self.store_enabled}
+        data["summary_cache"] = {"enabled": self.summary_cache_enabled}
+        data["watch"] = {"report_time": self.report_time}
+        data["summary"] = asdict(self.summary_limits)
+
+        if self.webhook_secret:
+            data["webhook"] = {
+                "secret": self.webhook_secret,
+                "host": self.webhook_host,
+                "port": self.webhook_port,
+            }
+
         if self.anthropic_api_key:
             data["anthropic"] = {"api_key": self.anthropic_api_key}
 
@@ -80,6 +150,12 @@ class Config:
         CONFIG_PATH.chmod(0o600)  # Secure permissions
 
 
+def parse_summary_limits(summary: dict) -> SummaryLimits:
+    """Parse the "summary" config section, ignoring unknown keys."""
+    known = {f.name for f in fields(SummaryLimits)}
+    return SummaryLimits(**{k: v for k, v in summary.items() if k in known})
+
+
 def generate_private_key() -> str:
     """Generate a new private key as hex string."""
     return secrets.token_hex(32)
@@ -104,11 +180,27 @@ def load_config() -> Config:
     raw_private_key = nostr_config.get("private_key_hex") or nostr_config.get("nsec")
     private_key_hex = parse_private_key(raw_private_key) if raw_private_key else None
 
+    # Fetch settings used to live in a single "source" object
+    source = data.get("source", {})
+    fetch = data.get("fetch", source if isinstance(source, dict) else {})
+
     return Config(
         relays=data.get("relays", {}).get("urls", DEFAULT_RELAYS.copy()),
-        source_url=data.get("source", {}).get("url", DEFAULT_SOURCE_URL),
-        lookback_hours=data.get("source", {}).get("lookback_hours", DEFAULT_LOOKBACK_HOURS),
+        sources=parse_sources(source),
+        max_concurrency=fetch.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        fetch_mode=fetch.get("mode", DEFAULT_FETCH_MODE),
+        content_format=fetch.get("content", DEFAULT_CONTENT_FORMAT),
+        fetch_budget_seconds=fetch.get(
+            "fetch_budget_seconds", DEFAULT_FETCH_BUDGET_SECONDS
+        ),
+        store_enabled=data.get("store", {}).get("enabled", True),
+        summary_cache_enabled=data.get("summary_cache", {}).get("enabled", True),
+        webhook_secret=data.get("webhook", {}).get("secret"),
+        webhook_host=data.get("webhook", {}).get("host", DEFAULT_WEBHOOK_HOST),
+        webhook_port=data.get("webhook", {}).get("port", DEFAULT_WEBHOOK_PORT),
+        report_time=data.get("watch", {}).get("report_time", DEFAULT_REPORT_TIME),
         anthropic_api_key=data.get("anthropic", {}).get("api_key") or os.environ.get("ANTHROPIC_API_KEY"),
+        summary_limits=parse_summary_limits(data.get("summary", {})),
         private_key_hex=private_key_hex,
         bunker_uri=nostr_config.get("bunker_uri"),
         app_key_hex=nostr_config.get("app_key_hex"),
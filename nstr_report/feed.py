@@ -0,0 +1,127 @@
+"""Incremental RSS 2.0 / Atom parsing."""
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import Element, XMLPullParser
+
+# Elements holding one feed entry (RSS 2.0 and Atom)
+ENTRY_TAGS = ("item", "entry")
+
+
+@dataclass(slots=True)
+class FeedEntry:
+    """A single RSS item or Atom entry."""
+
+    id: str
+    title: str
+    link: str
+    author: str
+    published: datetime
+    content: str  # HTML
+    categories: tuple[str, ...]
+
+
+def _local(tag: str) -> str:
+    """Strip the XML namespace from a tag name."""
+    return tag.rpartition("}")[2]
+
+
+def _parse_date(value: str) -> datetime | None:
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        # Atom uses RFC 3339
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            # RSS uses RFC 822
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _parse_entry(element: Element) -> FeedEntry | None:
+    """Build a FeedEntry from an <item> or <entry> element."""
+    fields: dict[str, str] = {}
+    categories = []
+    link = ""
+
+    for child in element:
+        name = _local(child.tag)
+        text = (child.text or "").strip()
+        if name == "link":
+            # Atom links carry the URL in href; prefer rel="alternate"
+            href = child.get("href")
+            if href is None:
+                link = link or text
+            elif child.get("rel", "alternate") == "alternate" or not link:
+                link = href
+        elif name == "category":
+            categories.append(child.get("term") or text)
+        elif name == "author":
+            # Atom nests the name, RSS puts an address in the text
+            author_name = next((c.text for c in child if _local(c.tag) == "name"), None)
+            fields.setdefault("author", (author_name or text).strip())
+        elif name == "creator":
+            fields["author"] = text
+        elif name in ("encoded", "content"):
+            fields["content"] = child.text or ""
+        elif name in ("description", "summary"):
+            fields.setdefault("content", child.text or "")
+        elif name in ("pubDate", "published"):
+            fields["published"] = text
+        elif name == "updated":
+            fields.setdefault("published", text)
+        elif name in ("guid", "id", "title"):
+            fields[name] = text
+
+    published = _parse_date(fields.get("published", ""))
+    entry_id = fields.get("guid") or fields.get("id") or link
+    if published is None or not entry_id:
+        return None
+
+    return FeedEntry(
+        id=entry_id,
+        title=fields.get("title", ""),
+        link=link,
+        author=fields.get("author") or "unknown",
+        published=published,
+        content=fields.get("content", ""),
+        categories=tuple(c for c in categories if c),
+    )
+
+
+async def iter_feed_entries(chunks: AsyncIterator[bytes]) -> AsyncIterator[FeedEntry]:
+    """Parse an RSS or Atom feed incrementally from a stream of byte chunks.
+
+    Entries are yielded as soon as their closing tag arrives and are then
+    detached from the tree, so memory use is bounded by the largest entry
+    rather than the size of the feed. Entries without a date or ID are
+    skipped.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    parents: list[Element] = []
+
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                parents.append(element)
+                continue
+
+            parents.pop()
+            if _local(element.tag) not in ENTRY_TAGS:
+                continue
+
+            entry = _parse_entry(element)
+            element.clear()
+            if parents:
+                parents[-1].remove(element)
+            if entry is not None:
+                yield entry
+
+    parser.close()
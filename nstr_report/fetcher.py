@@ -1,45 +1,170 @@
 """Fetch activity from bnoc.xyz Discourse forum."""
 
-import re
+import asyncio
+import sys
+from collections import Counter
+from collections.abc import AsyncIterator, Iterable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from html import unescape
+from typing import TYPE_CHECKING
 
 import httpx
 
+from .httpcache import HTTPCache
+from .planner import has_new_posts, plan_fetches
+from .session import FetchBudget, FetchBudgetExceeded, FetchSession
+from .text import html_to_text, markdown_to_text
 
-@dataclass
+if TYPE_CHECKING:
+    from .cassette import Cassette
+    from .store import Store
+
+# Maximum number of topic requests in flight at once
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Safety limit on latest.json pages followed in one run
+MAX_LATEST_PAGES = 100
+
+# Posts requested per /t/{id}/posts.json call (Discourse's chunk size)
+POSTS_BATCH_SIZE = 20
+
+# Post batch requests in flight at once for a single topic
+DEFAULT_MAX_POST_BATCHES = 4
+
+# Safety limit on /posts.json pages followed in one run
+MAX_POSTS_PAGES = 200
+
+# Ingestion modes: one request per topic, or the forum-wide posts feed
+FETCH_MODE_TOPICS = "topics"
+FETCH_MODE_POSTS = "posts"
+FETCH_MODES = (FETCH_MODE_TOPICS, FETCH_MODE_POSTS)
+
+# Post body formats: rendered HTML, or the author's raw markdown
+CONTENT_COOKED = "cooked"
+CONTENT_RAW = "raw"
+CONTENT_FORMATS = (CONTENT_COOKED, CONTENT_RAW)
+
+
+def _epoch(dt: datetime | int) -> int:
+    """Store a timestamp as whole epoch seconds."""
+    return dt if isinstance(dt, int) else int(dt.timestamp())
+
+
+def _from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+@dataclass(slots=True, frozen=True, init=False)
 class Post:
-    """A post within a topic."""
+    """A post within a topic.
+
+    Slotted and immutable to keep large backfills small in memory: the
+    author name is interned and the timestamp is stored as epoch seconds,
+    with created_at converting it back on access.
+    """
 
     id: int
     author: str
     content: str  # Plain text content
-    created_at: datetime
+    created_ts: int  # Epoch seconds
     post_number: int
 
+    def __init__(
+        self,
+        id: int,
+        author: str,
+        content: str,
+        created_at: datetime | int,
+        post_number: int,
+    ):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "author", sys.intern(author))
+        object.__setattr__(self, "content", content)
+        object.__setattr__(self, "created_ts", _epoch(created_at))
+        object.__setattr__(self, "post_number", post_number)
 
-@dataclass
+    @property
+    def created_at(self) -> datetime:
+        return _from_epoch(self.created_ts)
+
+
+@dataclass(slots=True, init=False)
 class Topic:
-    """A topic from bnoc.xyz."""
+    """A topic from bnoc.xyz.
+
+    Slotted like Post, with interned author and tag strings and epoch
+    second timestamps exposed as datetime properties.
+    """
 
     id: int
     title: str
     slug: str
     author: str
     posts_count: int
-    last_posted_at: datetime
-    bumped_at: datetime
-    created_at: datetime
-    tags: list[str]
+    last_posted_ts: int  # Epoch seconds
+    bumped_ts: int  # Epoch seconds
+    created_ts: int  # Epoch seconds
+    tags: tuple[str, ...]
     url: str
-    posts: list[Post] = field(default_factory=list)
+    highest_post_number: int
+    posts: list[Post]
+    fetch_error: str | None  # Set if posts could not be fetched
+    source_url: str  # Forum the topic was fetched from
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        slug: str,
+        author: str,
+        posts_count: int,
+        last_posted_at: datetime | int,
+        bumped_at: datetime | int,
+        created_at: datetime | int,
+        tags: Iterable[str],
+        url: str,
+        highest_post_number: int = 0,
+        posts: list[Post] | None = None,
+        fetch_error: str | None = None,
+        source_url: str = "",
+    ):
+        self.id = id
+        self.title = title
+        self.slug = slug
+        self.author = sys.intern(author)
+        self.posts_count = posts_count
+        self.last_posted_ts = _epoch(last_posted_at)
+        self.bumped_ts = _epoch(bumped_at)
+        self.created_ts = _epoch(created_at)
+        self.tags = tuple(sys.intern(tag) for tag in tags)
+        self.url = url
+        self.highest_post_number = highest_post_number
+        self.posts = posts if posts is not None else []
+        self.fetch_error = fetch_error
+        self.source_url = sys.intern(source_url)
+
+    @property
+    def last_posted_at(self) -> datetime:
+        return _from_epoch(self.last_posted_ts)
+
+    @property
+    def bumped_at(self) -> datetime:
+        return _from_epoch(self.bumped_ts)
+
+    @property
+    def created_at(self) -> datetime:
+        return _from_epoch(self.created_ts)
 
     @property
     def is_new(self) -> bool:
         """Check if topic was created recently (same day as last activity)."""
         return self.created_at.date() == self.bumped_at.date()
 
+    @property
+    def complete(self) -> bool:
+        """Check if all posts for this topic were fetched."""
+        return self.fetch_error is None
+
 
 @dataclass
 class Activity:
@@ -47,7 +172,8 @@ class Activity:
 
     topics: list[Topic]
     fetched_at: datetime
-    source_url: str
+    source_url: str  # Comma-separated when merged from several forums
+    failed_sources: dict[str, str] = field(default_factory=dict)  # URL -> error
 
 
 def parse_datetime(dt_str: str) -> datetime:
@@ -56,116 +182,570 @@ def parse_datetime(dt_str: str) -> datetime:
     return datetime.fromisoformat(dt_str)
 
 
-def html_to_text(html: str) -> str:
-    """Convert HTML to plain text."""
-    # Remove image tags but keep alt text
-    text = re.sub(r'<img[^>]*alt="([^"]*)"[^>]*>', r'[\1]', html)
-    # Remove all other HTML tags
-    text = re.sub(r'<[^>]+>', ' ', text)
-    # Unescape HTML entities
-    text = unescape(text)
-    # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+def _post_content(post_data: dict, raw: bool) -> str:
+    """Plain text of a post, from raw markdown if wanted and available."""
+    if raw and post_data.get("raw") is not None:
+        return markdown_to_text(post_data["raw"])
+    return html_to_text(post_data.get("cooked", ""))
 
 
-def fetch_topic_posts(
+def parse_post(post_data: dict, raw: bool = False) -> Post:
+    """Build a Post from a Discourse post JSON object."""
+    return Post(
+        id=post_data["id"],
+        author=post_data["username"],
+        content=_post_content(post_data, raw),
+        created_at=parse_datetime(post_data["created_at"]),
+        post_number=post_data["post_number"],
+    )
+
+
+async def _fetch_post_batch(
+    session: FetchSession,
+    source_url: str,
+    topic_id: int,
+    post_ids: list[int],
+    raw: bool = False,
+) -> list[dict]:
+    """Fetch a batch of posts of a topic by ID."""
+    query = "&".join(f"post_ids[]={post_id}" for post_id in post_ids)
+    if raw:
+        query += "&include_raw=1"
+    data = await session.get_json(f"{source_url}/t/{topic_id}/posts.json?{query}")
+    return data.get("post_stream", {}).get("posts", [])
+
+
+async def fetch_topic_posts(
+    session: FetchSession,
     source_url: str,
     topic_id: int,
     topic_slug: str,
     since: datetime,
+    max_batches: int = DEFAULT_MAX_POST_BATCHES,
+    known_ids: set[int] | None = None,
+    from_post_number: int | None = None,
+    raw: bool = False,
+    max_posts: int | None = None,
+    issued: Counter[str] | None = None,
 ) -> list[Post]:
-    """Fetch posts for a specific topic that are newer than since."""
-    response = httpx.get(
-        f"{source_url}/t/{topic_slug}/{topic_id}.json",
-        headers={"Accept": "application/json"},
-        timeout=30.0,
-    )
-    response.raise_for_status()
-    data = response.json()
+    """Fetch posts for a specific topic that are newer than since.
+
+    The topic endpoint only embeds the first chunk of posts; the rest are
+    listed by ID in post_stream.stream. Missing IDs are fetched newest
+    first in batches of POSTS_BATCH_SIZE, up to max_batches at a time,
+    stopping once a round of batches reaches back past since.
+
+    Posts in known_ids (already stored locally) are never requested or
+    returned. from_post_number asks for the chunk starting at that post
+    instead of the first one. max_posts caps the posts loaded to that
+    many of the newest. With raw, post text comes from the raw markdown
+    rather than the cooked HTML. Each request sent is counted in issued
+    under "topic" or "batch", whether or not it succeeds.
+    """
+    issued = Counter() if issued is None else issued
+    url = f"{source_url}/t/{topic_slug}/{topic_id}"
+    if from_post_number:
+        url += f"/{from_post_number}"
+    url += ".json?include_raw=1" if raw else ".json"
+    issued["topic"] += 1
+    data = await session.get_json(url)
+    post_stream = data.get("post_stream", {})
+
+    known_ids = known_ids or set()
+    posts_data = [p for p in post_stream.get("posts", []) if p["id"] not in known_ids]
+    loaded = {post_data["id"] for post_data in posts_data} | known_ids
+    missing = [
+        post_id for post_id in reversed(post_stream.get("stream", []))
+        if post_id not in loaded
+    ]
+    if max_posts is not None:
+        newest = set(post_stream.get("stream", [])[-max_posts:])
+        missing = [post_id for post_id in missing if post_id in newest]
+
+    batches = [
+        missing[i:i + POSTS_BATCH_SIZE]
+        for i in range(0, len(missing), POSTS_BATCH_SIZE)
+    ]
+    step = max(1, max_batches)
+    for i in range(0, len(batches), step):
+        issued["batch"] += len(batches[i:i + step])
+        results = await asyncio.gather(*(
+            _fetch_post_batch(session, source_url, topic_id, batch, raw)
+            for batch in batches[i:i + step]
+        ))
+        reached_since = False
+        for batch_posts in results:
+            posts_data.extend(batch_posts)
+            if any(parse_datetime(p["created_at"]) < since for p in batch_posts):
+                reached_since = True
+        if reached_since:
+            break
 
     posts = []
-    for post_data in data.get("post_stream", {}).get("posts", []):
-        created_at = parse_datetime(post_data["created_at"])
-
+    for post_data in posts_data:
         # Only include posts from the lookback period
-        if created_at >= since:
-            content = html_to_text(post_data.get("cooked", ""))
-            post = Post(
-                id=post_data["id"],
-                author=post_data["username"],
-                content=content,
-                created_at=created_at,
-                post_number=post_data["post_number"],
-            )
-            posts.append(post)
+        if parse_datetime(post_data["created_at"]) >= since:
+            posts.append(parse_post(post_data, raw))
 
+    posts.sort(key=lambda p: p.post_number)
     return posts
 
 
-def fetch_activity(source_url: str, lookback_hours: int = 24) -> Activity:
-    """Fetch recent activity from bnoc.xyz.
+async def _fetch_topic_into(
+    session: FetchSession,
+    semaphore: asyncio.Semaphore,
+    source_url: str,
+    topic: Topic,
+    since: datetime,
+    known_ids: set[int] | None = None,
+    from_post_number: int | None = None,
+    raw: bool = False,
+    max_posts: int | None = None,
+    issued: Counter[str] | None = None,
+) -> Topic:
+    """Fetch posts for a topic, recording any failure on the topic itself."""
+    async with semaphore:
+        try:
+            topic.posts = await fetch_topic_posts(
+                session, source_url, topic.id, topic.slug, since,
+                known_ids=known_ids, from_post_number=from_post_number, raw=raw,
+                max_posts=max_posts, issued=issued,
+            )
+        except (httpx.HTTPError, FetchBudgetExceeded, ValueError, KeyError) as e:
+            topic.fetch_error = str(e) or type(e).__name__
+    return topic
+
+
+def _page_url(source_url: str, more_topics_url: str) -> str:
+    """Turn a topic_list.more_topics_url into its JSON endpoint URL."""
+    path, _, query = more_topics_url.partition("?")
+    if not path.endswith(".json"):
+        path += ".json"
+    return f"{source_url}{path}?{query}" if query else f"{source_url}{path}"
+
+
+async def iter_latest_topics(
+    session: FetchSession,
+    source_url: str,
+    cutoff: datetime,
+) -> AsyncIterator[Topic]:
+    """Yield topics bumped since cutoff, following latest.json pages.
+
+    Pages are requested one at a time and only while the previous page
+    still reached back past the cutoff, so exactly the pages needed are
+    fetched. Pinned topics are ignored when deciding whether to continue,
+    since they sit at the top of the list regardless of bump time.
+    """
+    url = f"{source_url}/latest.json"
+
+    for _ in range(MAX_LATEST_PAGES):
+        data = await session.get_json(url)
+        topic_list = data.get("topic_list", {})
+
+        # Build user lookup
+        users = {u["id"]: u["username"] for u in data.get("users", [])}
+
+        oldest = None
+        for topic_data in topic_list.get("topics", []):
+            bumped_at = parse_datetime(topic_data["bumped_at"])
+            if not topic_data.get("pinned") and (oldest is None or bumped_at < oldest):
+                oldest = bumped_at
+
+            if bumped_at >= cutoff:
+                yield _parse_topic(topic_data, users, source_url)
+
+        more_topics_url = topic_list.get("more_topics_url")
+        if not more_topics_url or oldest is None or oldest < cutoff:
+            return
+        url = _page_url(source_url, more_topics_url)
+
+
+async def iter_latest_posts(
+    session: FetchSession,
+    source_url: str,
+    cutoff: datetime,
+) -> AsyncIterator[dict]:
+    """Yield post objects from the forum-wide /posts.json feed, newest first.
+
+    The feed is walked backwards with before=<lowest post ID seen> until a
+    page reaches back past the cutoff.
+    """
+    url = f"{source_url}/posts.json"
+
+    for _ in range(MAX_POSTS_PAGES):
+        data = await session.get_json(url)
+        posts_data = data.get("latest_posts", [])
+        if not posts_data:
+            return
+
+        reached_cutoff = False
+        for post_data in posts_data:
+            if parse_datetime(post_data["created_at"]) >= cutoff:
+                yield post_data
+            else:
+                reached_cutoff = True
+
+        if reached_cutoff:
+            return
+        url = f"{source_url}/posts.json?before={min(p['id'] for p in posts_data)}"
+
+
+async def _fetch_topic_metadata(
+    session: FetchSession,
+    source_url: str,
+    topic_id: int,
+) -> Topic:
+    """Fetch a single topic's metadata from its topic view."""
+    data = await session.get_json(f"{source_url}/t/{topic_id}.json")
+    last_posted_at = parse_datetime(data["last_posted_at"])
+    return Topic(
+        id=data["id"],
+        title=data["title"],
+        slug=data["slug"],
+        author=data.get("details", {}).get("created_by", {}).get("username", "unknown"),
+        posts_count=data["posts_count"],
+        highest_post_number=data.get("highest_post_number", data["posts_count"]),
+        last_posted_at=last_posted_at,
+        bumped_at=parse_datetime(data["bumped_at"]) if data.get("bumped_at") else last_posted_at,
+        created_at=parse_datetime(data["created_at"]),
+        tags=data.get("tags", []),
+        url=f"{source_url}/t/{data['slug']}/{data['id']}",
+        source_url=source_url,
+    )
+
+
+def filter_tags(topics: list[Topic], tags: Iterable[str]) -> list[Topic]:
+    """Keep topics carrying any of the given tags (all topics if none)."""
+    wanted = set(tags)
+    if not wanted:
+        return topics
+    return [topic for topic in topics if wanted.intersection(topic.tags)]
+
+
+async def _collect_latest_topics(
+    session: FetchSession,
+    source_url: str,
+    cutoff: datetime,
+) -> list[Topic]:
+    """Collect topics from latest.json pages.
+
+    If the fetch budget runs out after at least one page, the topics
+    listed so far are kept and older pages are skipped.
+    """
+    topics = []
+    try:
+        async for topic in iter_latest_topics(session, source_url, cutoff):
+            topics.append(topic)
+    except FetchBudgetExceeded:
+        if not topics:
+            raise
+        print("Warning: Fetch budget ran out while listing topics, older topics skipped")
+    return topics
+
+
+async def iter_topics_mode(
+    session: FetchSession,
+    source_url: str,
+    cutoff: datetime,
+    max_concurrency: int,
+    store: "Store | None" = None,
+    raw: bool = False,
+    tags: Iterable[str] = (),
+) -> AsyncIterator[Topic]:
+    """Yield topics from latest.json as soon as each one's posts are fetched.
+
+    Topic requests are planned first (see plan_fetches): topics bumped
+    without a new post are dropped, and with a store, topics whose
+    counters match the stored high-water marks are not requested at all
+    (and are yielded first) while the rest only fetch the posts past the
+    stored mark. Post edits on unchanged topics are not seen. Topics
+    whose posts could not be fetched are yielded with fetch_error set.
+    """
+    # Collect topics with recent activity across as many pages as needed
+    topics = await _collect_latest_topics(session, source_url, cutoff)
+    topics = filter_tags(topics, tags)
+
+    marks = store.topic_marks(source_url) if store else {}
+    plan = plan_fetches(topics, cutoff, POSTS_BATCH_SIZE, marks)
+    print(f"Plan for {source_url}: {plan.summary()}")
+
+    fetched = {id(fetch.topic) for fetch in plan.fetches}
+    for topic in plan.topics:
+        if id(topic) not in fetched:
+            yield topic
+
+    # Fetch the actual posts for all topics concurrently
+    issued: Counter[str] = Counter()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = []
+    for fetch in plan.fetches:
+        known_ids = store.post_ids(source_url, fetch.topic.id) if fetch.incremental else None
+        tasks.append(asyncio.ensure_future(_fetch_topic_into(
+            session, semaphore, source_url, fetch.topic, cutoff,
+            known_ids=known_ids,
+            from_post_number=fetch.from_post_number,
+            raw=raw,
+            max_posts=fetch.posts_back,
+            issued=issued,
+        )))
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    # Retries and hedges are left out, as they are in the plan's estimate
+    print(
+        f"Plan for {source_url}: {issued.total()} topic requests issued "
+        f"({issued['batch']} post batches), ~{plan.planned_requests} planned"
+    )
+
+
+async def _collect_topics_mode(
+    session: FetchSession,
+    source_url: str,
+    cutoff: datetime,
+    max_concurrency: int,
+    store: "Store | None" = None,
+    raw: bool = False,
+    tags: Iterable[str] = (),
+) -> list[Topic]:
+    """Collect topics from latest.json with their posts; see iter_topics_mode."""
+    return [
+        topic
+        async for topic in iter_topics_mode(
+            session, source_url, cutoff, max_concurrency, store, raw, tags
+        )
+    ]
+
+
+async def _collect_posts_mode(
+    session: FetchSession,
+    source_url: str,
+    cutoff: datetime,
+    max_concurrency: int,
+    raw: bool = False,
+) -> list[Topic]:
+    """Collect topics by walking the posts feed and grouping posts by topic.
+
+    Topic metadata comes from the latest.json pages; only topics that
+    appear in the feed but not in that listing are fetched individually.
+    This turns one request per topic into one request per page of posts.
+
+    If the fetch budget runs out mid-walk, the posts gathered so far are
+    kept and every topic is marked incomplete.
+    """
+    topics = {
+        topic.id: topic
+        for topic in await _collect_latest_topics(session, source_url, cutoff)
+    }
+
+    posts_by_topic: dict[int, list[Post]] = {}
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch_metadata(topic_id: int) -> None:
+        async with semaphore:
+            topics[topic_id] = await _fetch_topic_metadata(session, source_url, topic_id)
+
+    budget_error = None
+    try:
+        async for post_data in iter_latest_posts(session, source_url, cutoff):
+            posts_by_topic.setdefault(post_data["topic_id"], []).append(
+                parse_post(post_data, raw)
+            )
+
+        unseen = [topic_id for topic_id in posts_by_topic if topic_id not in topics]
+        await asyncio.gather(*(fetch_metadata(topic_id) for topic_id in unseen))
+    except FetchBudgetExceeded as e:
+        budget_error = str(e)
+
+    for topic_id, posts in posts_by_topic.items():
+        if topic_id in topics:
+            topics[topic_id].posts = sorted(posts, key=lambda p: p.post_number)
+    if budget_error:
+        for topic in topics.values():
+            topic.fetch_error = budget_error
+    # Topics bumped by edits or moderation have no posts to report
+    return [topic for topic in topics.values() if has_new_posts(topic, cutoff)]
+
+
+async def fetch_activity_async(
+    source_url: str,
+    lookback_hours: int = 24,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    session: FetchSession | None = None,
+    http_cache: bool = True,
+    mode: str = FETCH_MODE_TOPICS,
+    store: "Store | None" = None,
+    offline: bool = False,
+    content: str = CONTENT_COOKED,
+    budget_seconds: float | None = None,
+    tags: Iterable[str] = (),
+    cassette: "Cassette | None" = None,
+) -> Activity:
+    """Fetch recent activity from bnoc.xyz, fetching topics concurrently.
 
     Args:
         source_url: Base URL of the Discourse forum
         lookback_hours: Number of hours to look back for activity
+        max_concurrency: Maximum number of topic requests in flight at once
+        session: Shared fetch session; a new one is opened if not given
+        http_cache: Use the on-disk HTTP cache when opening a new session
+        mode: "topics" to fetch each topic, or "posts" to walk the
+            forum-wide posts feed (falls back to "topics" on failure)
+        store: Local mirror to sync into and build the Activity from
+        offline: Build the Activity from the store without any requests
+        content: "cooked" to convert rendered HTML, or "raw" to request and
+            normalize the raw markdown (HTML is used where raw is missing)
+        budget_seconds: Overall time limit for the fetch stage when opening
+            a new session. Requests still pending at the deadline are
+            abandoned and their topics returned incomplete.
+        tags: Only keep topics carrying any of these tags
+        cassette: Record the new session's traffic to, or replay it from,
+            this cassette (the HTTP cache is not used with a cassette)
 
     Returns:
-        Activity object with recent topics and their posts
+        Activity object with recent topics and their posts. Topics whose
+        posts could not be fetched are kept with fetch_error set.
     """
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
-
-    # Fetch the latest topics JSON
-    response = httpx.get(
-        f"{source_url}/latest.json",
-        headers={"Accept": "application/json"},
-        timeout=30.0,
-    )
-    response.raise_for_status()
-    data = response.json()
-
-    # Build user lookup
-    users = {u["id"]: u["username"] for u in data.get("users", [])}
-
-    # Filter topics with recent activity
-    recent_topics = []
-    for topic_data in data.get("topic_list", {}).get("topics", []):
-        bumped_at = parse_datetime(topic_data["bumped_at"])
-
-        if bumped_at >= cutoff:
-            # Find the original poster
-            posters = topic_data.get("posters", [])
-            author = "unknown"
-            for poster in posters:
-                if "Original Poster" in poster.get("description", ""):
-                    author = users.get(poster["user_id"], "unknown")
-                    break
-
-            topic = Topic(
-                id=topic_data["id"],
-                title=topic_data["title"],
-                slug=topic_data["slug"],
-                author=author,
-                posts_count=topic_data["posts_count"],
-                last_posted_at=parse_datetime(topic_data["last_posted_at"]),
-                bumped_at=bumped_at,
-                created_at=parse_datetime(topic_data["created_at"]),
-                tags=topic_data.get("tags", []),
-                url=f"{source_url}/t/{topic_data['slug']}/{topic_data['id']}",
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch mode: {mode}")
+    if content not in CONTENT_FORMATS:
+        raise ValueError(f"Unknown content format: {content}")
+    raw = content == CONTENT_RAW
+
+    if offline:
+        if store is None:
+            raise ValueError("Offline fetch requires a store")
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+        activity = store.build_activity(source_url, cutoff)
+        activity.topics = filter_tags(activity.topics, tags)
+        return activity
+
+    if session is None:
+        cache = HTTPCache() if http_cache and cassette is None else None
+        budget = FetchBudget(budget_seconds) if budget_seconds else None
+        async with FetchSession(
+            max_connections=max_concurrency, cache=cache, budget=budget, cassette=cassette
+        ) as session:
+            activity = await fetch_activity_async(
+                source_url, lookback_hours, max_concurrency, session,
+                mode=mode, store=store, content=content, tags=tags,
             )
-
-            # Fetch the actual posts for this topic
-            topic.posts = fetch_topic_posts(
-                source_url, topic.id, topic.slug, cutoff
+        print(f"HTTP: {session.stats.summary()}")
+        return activity
+
+    # Pinned to the recording's time when replaying a cassette
+    now = session.now()
+    cutoff = now - timedelta(hours=lookback_hours)
+
+    recent_topics = None
+    if mode == FETCH_MODE_POSTS:
+        try:
+            recent_topics = await _collect_posts_mode(
+                session, source_url, cutoff, max_concurrency, raw
             )
+            recent_topics = filter_tags(recent_topics, tags)
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            print(f"Warning: Posts feed failed ({e}), falling back to per-topic fetch")
+
+    if recent_topics is None:
+        recent_topics = await _collect_topics_mode(
+            session, source_url, cutoff, max_concurrency, store, raw, tags
+        )
 
-            recent_topics.append(topic)
+    return assemble_activity(source_url, cutoff, recent_topics, store, tags, now)
+
+
+def assemble_activity(
+    source_url: str,
+    cutoff: datetime,
+    topics: list[Topic],
+    store: "Store | None" = None,
+    tags: Iterable[str] = (),
+    now: datetime | None = None,
+) -> Activity:
+    """Turn freshly fetched topics into an Activity, syncing the store.
+
+    With a store, complete topics are saved and the Activity is built from
+    the store, so posts seen on earlier runs are included; topics that
+    failed keep their fetch_error. Topics are sorted by most recent
+    activity first. now (the current time if not given) ends the window
+    and becomes the Activity's fetched_at.
+    """
+    now = now or datetime.now(timezone.utc)
+    if store is not None:
+        # Failed topics keep their old marks so they are retried next run
+        for topic in topics:
+            if topic.complete:
+                store.save_topic(source_url, topic)
+
+        activity = store.build_activity(source_url, cutoff, now)
+        activity.topics = filter_tags(activity.topics, tags)
+        failed = {t.id: t for t in topics if not t.complete}
+        for topic in activity.topics:
+            if topic.id in failed:
+                topic.fetch_error = failed.pop(topic.id).fetch_error
+        activity.topics.extend(failed.values())
+        activity.topics.sort(key=lambda t: t.bumped_ts, reverse=True)
+        return activity
 
     # Sort by most recent activity first
-    recent_topics.sort(key=lambda t: t.bumped_at, reverse=True)
+    topics.sort(key=lambda t: t.bumped_ts, reverse=True)
 
     return Activity(
-        topics=recent_topics,
-        fetched_at=datetime.now(timezone.utc),
+        topics=topics,
+        fetched_at=now,
         source_url=source_url,
     )
+
+
+def _parse_topic(topic_data: dict, users: dict[int, str], source_url: str) -> Topic:
+    """Build a Topic (without posts) from a latest.json topic entry."""
+    # Find the original poster
+    author = "unknown"
+    for poster in topic_data.get("posters", []):
+        if "Original Poster" in poster.get("description", ""):
+            author = users.get(poster["user_id"], "unknown")
+            break
+
+    return Topic(
+        id=topic_data["id"],
+        title=topic_data["title"],
+        slug=topic_data["slug"],
+        author=author,
+        posts_count=topic_data["posts_count"],
+        highest_post_number=topic_data.get("highest_post_number", topic_data["posts_count"]),
+        last_posted_at=parse_datetime(topic_data["last_posted_at"]),
+        bumped_at=parse_datetime(topic_data["bumped_at"]),
+        created_at=parse_datetime(topic_data["created_at"]),
+        tags=topic_data.get("tags", []),
+        url=f"{source_url}/t/{topic_data['slug']}/{topic_data['id']}",
+        source_url=source_url,
+    )
+
+
+def fetch_activity(
+    source_url: str,
+    lookback_hours: int = 24,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    http_cache: bool = True,
+    mode: str = FETCH_MODE_TOPICS,
+    store: "Store | None" = None,
+    offline: bool = False,
+    content: str = CONTENT_COOKED,
+    budget_seconds: float | None = None,
+    tags: Iterable[str] = (),
+    cassette: "Cassette | None" = None,
+) -> Activity:
+    """Synchronous wrapper for fetch_activity_async."""
+    return asyncio.run(
+        fetch_activity_async(
+            source_url, lookback_hours, max_concurrency,
+            http_cache=http_cache, mode=mode, store=store, offline=offline,
+            content=content, budget_seconds=budget_seconds, tags=tags,
+            cassette=cassette,
+        )
+    )
+
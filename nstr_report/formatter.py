@@ -1,11 +1,18 @@
 """Format activity into Nostr-ready text."""
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
-import anthropic
-
-from .fetcher import Activity, Topic
+from .fetcher import Activity
+from .summarizer import (
+    Summarizer,
+    SummaryLimits,
+    format_topic_for_llm,
+    summarize_activity,
+    summarize_activity_async,
+)
+from .summarycache import SummaryCache
 
 
 NSTR_MESSAGE = "NSTR - Nothing Significant to Report"
@@ -28,9 +35,10 @@ def format_topic_list(activity: Activity) -> str:
     for topic in activity.topics:
         tag_str = f" [{', '.join(topic.tags)}]" if topic.tags else ""
         new_marker = " [NEW]" if topic.is_new else ""
+        partial_marker = " [PARTIAL]" if not topic.complete else ""
         post_count = len(topic.posts)
         lines.append(
-            f"  {topic.title}{tag_str}{new_marker} "
+            f"  {topic.title}{tag_str}{new_marker}{partial_marker} "
             f"({post_count} new post{'s' if post_count != 1 else ''})"
         )
         lines.append(f"    {topic.url}")
@@ -39,74 +47,49 @@ def format_topic_list(activity: Activity) -> str:
 
 def format_posts_for_llm(activity: Activity) -> str:
     """Format all posts for LLM consumption."""
-    sections = []
-
-    for topic in activity.topics:
-        section_lines = [
-            f"## Topic: {topic.title}",
-            f"Tags: {', '.join(topic.tags) if topic.tags else 'none'}",
-            f"URL: {topic.url}",
-            "",
-        ]
-
-        for post in topic.posts:
-            timestamp = post.created_at.strftime("%Y-%m-%d %H:%M UTC")
-            section_lines.append(f"### Post by {post.author} ({timestamp}):")
-            section_lines.append(post.content)
-            section_lines.append("")
-
-        sections.append("\n".join(section_lines))
-
-    return "\n---\n\n".join(sections)
+    return "\n---\n\n".join(format_topic_for_llm(topic) for topic in activity.topics)
 
 
-def generate_summary_with_claude(activity: Activity, api_key: str) -> str:
+def generate_summary_with_claude(
+    activity: Activity,
+    api_key: str,
+    limits: SummaryLimits | None = None,
+    cache: SummaryCache | None = None,
+) -> str:
     """Generate a comprehensive summary using Claude API.
 
+    Days too large for one prompt are summarized map-reduce; see
+    summarize_activity.
+
     Args:
         activity: The activity to summarize
         api_key: Anthropic API key
+        limits: Size, cost and latency bounds for summarization
+        cache: Summary cache; only content not summarized before is sent
 
     Returns:
         A summary of the discussions
     """
-    posts_text = format_posts_for_llm(activity)
-    topic_count = len(activity.topics)
-    post_count = sum(len(t.posts) for t in activity.topics)
-
-    prompt = f"""You are summarizing daily activity from the Bitcoin Network Operations Collective (BNOC) forum - a technical forum for Bitcoin network operators and developers.
-
-In the past 24 hours, there were {post_count} new posts across {topic_count} topic(s).
-
-Here is the full content of the discussions:
+    return summarize_activity(activity, api_key, limits, cache)
 
-{posts_text}
 
-Write a concise but informative summary for Bitcoin developers and network operators. Include:
-1. Key observations or findings reported
-2. Any security concerns or attacks discussed
-3. Notable technical details or data shared
-4. Action items or recommendations if any
-
-Keep the summary under 280 characters if there's only 1-2 posts, otherwise keep it under 500 characters. Be direct and technical. Do not use emojis. Do not use markdown formatting."""
-
-    client = anthropic.Anthropic(api_key=api_key)
-
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=600,
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    return message.content[0].text.strip()
-
-
-def format_activity(activity: Activity, anthropic_api_key: str | None = None) -> FormattedOutput:
+async def format_activity_async(
+    activity: Activity,
+    anthropic_api_key: str | None = None,
+    summary_limits: SummaryLimits | None = None,
+    summary_cache: SummaryCache | None = None,
+    summarizer: Summarizer | None = None,
+) -> FormattedOutput:
     """Format activity into a Nostr-ready message.
 
+    Awaitable, so fetching and summarizing can share one event loop.
+
     Args:
         activity: The fetched activity
         anthropic_api_key: Optional API key for Claude summary generation
+        summary_limits: Size, cost and latency bounds for the summary
+        summary_cache: Cache of earlier topic notes and summaries
+        summarizer: Long-lived summarizer to use instead of opening one
 
     Returns:
         FormattedOutput with message and AI status
@@ -121,7 +104,9 @@ def format_activity(activity: Activity, anthropic_api_key: str | None = None) ->
     # If we have Claude, generate a proper summary
     if anthropic_api_key and post_count > 0:
         try:
-            summary = generate_summary_with_claude(activity, anthropic_api_key)
+            summary = await summarize_activity_async(
+                activity, anthropic_api_key, summary_limits, summary_cache, summarizer
+            )
             lines = [
                 f"BNOC Daily Summary ({date_str})",
                 "",
@@ -175,3 +160,15 @@ def format_activity(activity: Activity, anthropic_api_key: str | None = None) ->
     ]
 
     return FormattedOutput(message="\n".join(lines))
+
+
+def format_activity(
+    activity: Activity,
+    anthropic_api_key: str | None = None,
+    summary_limits: SummaryLimits | None = None,
+    summary_cache: SummaryCache | None = None,
+) -> FormattedOutput:
+    """Synchronous wrapper for format_activity_async."""
+    return asyncio.run(
+        format_activity_async(activity, anthropic_api_key, summary_limits, summary_cache)
+    )
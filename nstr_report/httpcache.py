@@ -0,0 +1,167 @@
+"""Persistent conditional-GET cache for Discourse JSON responses."""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any
+
+HTTP_CACHE_DIR = Path.home() / ".cache" / "nstr-report" / "http"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB
+
+# Bodies (by their size on disk) kept decoded in memory for reuse; decoded
+# JSON takes several times the space of its text
+DEFAULT_MAX_DECODED_BYTES = 4 * 1024 * 1024  # 4 MiB
+
+
+@dataclass
+class CacheEntry:
+    """Validators and bookkeeping for one cached URL."""
+
+    url: str
+    etag: str | None
+    last_modified: str | None
+    size: int
+    used_at: float
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+class HTTPCache:
+    """On-disk response cache keyed by URL with LRU eviction.
+
+    Stores the ETag/Last-Modified validators for each URL so requests can
+    be made conditional. On a 304 the cached body is served instead, and
+    the most recently used bodies already decoded in this process (up to
+    max_decoded_bytes of them) are returned without decoding them again.
+    """
+
+    def __init__(
+        self,
+        path: Path = HTTP_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_decoded_bytes: int = DEFAULT_MAX_DECODED_BYTES,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_decoded_bytes = max_decoded_bytes
+        self._index_path = path / "index.json"
+        self._entries: dict[str, CacheEntry] = {}
+        self._decoded: OrderedDict[str, Any] = OrderedDict()
+        self._decoded_bytes = 0
+        self._dirty = False
+
+        try:
+            raw = json.loads(self._index_path.read_text())
+            self._entries = {k: CacheEntry(**v) for k, v in raw.items()}
+        except (OSError, ValueError, TypeError):
+            self._entries = {}
+
+    def _body_path(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def _forget_decoded(self, key: str) -> None:
+        if key in self._decoded:
+            del self._decoded[key]
+            self._decoded_bytes -= self._entries[key].size
+
+    def _remember_decoded(self, key: str, data: Any) -> None:
+        """Keep a decoded body, dropping the least recently used beyond the limit."""
+        self._forget_decoded(key)
+        size = self._entries[key].size
+        if size > self.max_decoded_bytes:
+            return
+        self._decoded[key] = data
+        self._decoded_bytes += size
+        while self._decoded_bytes > self.max_decoded_bytes:
+            old, _ = self._decoded.popitem(last=False)
+            self._decoded_bytes -= self._entries[old].size
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Headers that make a request for url conditional, if cached."""
+        entry = self._entries.get(_key(url))
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def load(self, url: str) -> Any | None:
+        """Return the cached decoded body for url, or None if missing."""
+        key = _key(url)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        entry.used_at = time.time()
+        self._dirty = True
+
+        if key in self._decoded:
+            self._decoded.move_to_end(key)
+            return self._decoded[key]
+        try:
+            data = json.loads(self._body_path(key).read_bytes())
+        except (OSError, ValueError):
+            del self._entries[key]
+            return None
+        self._remember_decoded(key, data)
+        return data
+
+    def store(self, url: str, headers: Any, body: str, data: Any) -> None:
+        """Cache a response body (as text) if the server sent validators for it."""
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+
+        key = _key(url)
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self._body_path(key).with_suffix(".tmp")
+        tmp.write_text(body, encoding="utf-8")
+        size = tmp.stat().st_size
+        tmp.replace(self._body_path(key))
+
+        if key in self._entries:
+            self._forget_decoded(key)
+        self._entries[key] = CacheEntry(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            size=size,
+            used_at=time.time(),
+        )
+        self._remember_decoded(key, data)
+        self._dirty = True
+
+    def evict(self) -> None:
+        """Drop least recently used entries until under max_bytes."""
+        total = sum(e.size for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1].used_at):
+            if total <= self.max_bytes:
+                break
+            self._body_path(key).unlink(missing_ok=True)
+            self._forget_decoded(key)
+            del self._entries[key]
+            total -= entry.size
+        self._dirty = True
+
+    def save(self) -> None:
+        """Evict if needed and persist the index."""
+        if not self._dirty:
+            return
+        self.evict()
+        self.path.mkdir(parents=True, exist_ok=True)
+        data = {k: asdict(e) for k, e in self._entries.items()}
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(self._index_path)
+        self._dirty = False
@@ -1,15 +1,24 @@
 """Main entry point for nstr-report."""
 
 import argparse
+import asyncio
 import json
 import sys
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
 
-from .config import load_config, CONFIG_PATH
-from .fetcher import fetch_activity
-from .formatter import format_activity
+from .backfill import backfill
+from .cassette import Cassette
+from .config import Config, load_config, CONFIG_PATH
+from .fetcher import Activity
+from .sources import SOURCE_DISCOURSE, fetch_sources
+from .formatter import FormattedOutput, format_activity, format_activity_async
 from .nostr import publish_note, get_public_key, fetch_latest_note
+from .store import Store, STORE_PATH
+from .summarizer import Summarizer
+from .summarycache import SUMMARY_CACHE_DIR, SummaryCache
+from .watch import parse_report_time, watch
+from .webhook import WebhookReceiver, replay_webhooks, serve_webhooks
 
 # Cache file for daily summary
 CACHE_PATH = Path.home() / ".cache" / "nstr-report" / "daily.json"
@@ -40,6 +49,104 @@ def update_cache_posted(timestamp: str) -> None:
         CACHE_PATH.write_text(json.dumps(cache, indent=2))
 
 
+def publish_message(
+    config: Config,
+    message: str,
+    ai_error_message: str | None = None,
+    update_profile: bool = False,
+) -> int:
+    """Publish a summary to Nostr, plus the AI failure notice if given."""
+    print(f"Publishing to {len(config.relays)} relays: {', '.join(config.relays)}")
+    try:
+        event_id = publish_note(
+            content=message,
+            relays=config.relays,
+            private_key_hex=config.private_key_hex,
+            bunker_uri=config.bunker_uri,
+            app_key_hex=config.app_key_hex,
+            update_profile=update_profile,
+        )
+        print(f"Published! Event ID: {event_id}")
+        if config.private_key_hex:
+            npub = get_public_key(config.private_key_hex)
+            print(f"View at: https://njump.me/{npub}")
+        
+        # Record the post time
+        update_cache_posted(datetime.now(timezone.utc).isoformat())
+        
+        # If AI failed (only on fresh generate), post angry notification
+        if ai_error_message:
+            print("AI failed - posting angry notification...")
+            try:
+                angry_event_id = publish_note(
+                    content=ai_error_message,
+                    relays=config.relays,
+                    private_key_hex=config.private_key_hex,
+                    bunker_uri=config.bunker_uri,
+                    app_key_hex=config.app_key_hex,
+                    update_profile=False,
+                )
+                print(f"Angry notification posted! Event ID: {angry_event_id}")
+            except Exception as e:
+                print(f"Warning: Could not post angry notification: {e}", file=sys.stderr)
+                
+    except Exception as e:
+        print(f"Error publishing to Nostr: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def report_activity(
+    config: Config,
+    activity: Activity,
+    dry_run: bool = False,
+    update_profile: bool = False,
+    summary_cache: SummaryCache | None = None,
+    output: FormattedOutput | None = None,
+) -> int:
+    """Summarize fetched activity, cache the summary and publish it.
+
+    If output is given (already formatted by the caller), it is published
+    as is instead of formatting activity again.
+    """
+    print(f"Found {len(activity.topics)} topics with activity")
+    for url, error in activity.failed_sources.items():
+        print(f"Warning: Could not fetch {url}: {error}", file=sys.stderr)
+    for topic in activity.topics:
+        if not topic.complete:
+            print(
+                f"Warning: Could not fetch posts for {topic.url}: {topic.fetch_error}",
+                file=sys.stderr,
+            )
+
+    # Format the message
+    if output is None:
+        output = format_activity(
+            activity, config.anthropic_api_key, config.summary_limits, summary_cache
+        )
+    if summary_cache is not None:
+        summary_cache.save()
+    message = output.message
+    ai_error_message = output.error_message if output.ai_failed else None
+
+    if dry_run:
+        print("\n--- Message (dry run) ---")
+        print(message)
+        if ai_error_message:
+            print("\n--- AI FAILED - Would also post: ---")
+            print(ai_error_message)
+        print("--- End message ---\n")
+        return 0
+
+    # Save to cache
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    save_cache(message, today)
+    print(f"Saved summary to cache for {today}")
+
+    return publish_message(config, message, ai_error_message, update_profile)
+
+
 def main() -> int:
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -65,6 +172,69 @@ def main() -> int:
         action="store_true",
         help="Repost the cached daily summary (don't fetch new data)",
     )
+    parser.add_argument(
+        "--no-http-cache",
+        action="store_true",
+        help="Don't use or update the on-disk HTTP response cache",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Don't sync into the local topic/post store (full fetch)",
+    )
+    parser.add_argument(
+        "--no-summary-cache",
+        action="store_true",
+        help="Summarize every topic again instead of reusing cached summaries",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Build the summary from the local store without fetching",
+    )
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        metavar="DIR",
+        type=Path,
+        help="Record all forum requests and responses to a cassette in DIR",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        metavar="DIR",
+        type=Path,
+        help="Serve forum responses from the cassette in DIR (no network)",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        action="store_true",
+        help="With --replay, wait the recorded response times",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Poll sources into the local store and publish at the report time",
+    )
+    parser.add_argument(
+        "--serve-webhooks",
+        action="store_true",
+        help="Receive Discourse webhooks into the local store until interrupted",
+    )
+    parser.add_argument(
+        "--replay-webhooks",
+        nargs="+",
+        metavar="CAPTURE",
+        type=Path,
+        help="Send captured webhook payloads (JSON files) to the local receiver",
+    )
+    parser.add_argument(
+        "--backfill",
+        nargs=2,
+        metavar=("START", "END"),
+        type=date.fromisoformat,
+        help="Summarize each day's stored activity from START to END (YYYY-MM-DD) "
+        "into the summary cache with the Message Batches API",
+    )
 
     args = parser.parse_args()
 
@@ -74,6 +244,10 @@ def main() -> int:
     if args.show_config:
         print(f"Config file: {CONFIG_PATH}")
         print(f"Cache file: {CACHE_PATH}")
+        print(f"Store: {STORE_PATH if config.store_enabled else 'disabled'}")
+        print(
+            f"Summary cache: {SUMMARY_CACHE_DIR if config.summary_cache_enabled else 'disabled'}"
+        )
         if config.bunker_uri:
             print(f"Signer: Remote (NIP-46 bunker)")
             print(f"Bunker URI: {config.bunker_uri[:50]}...")
@@ -83,10 +257,29 @@ def main() -> int:
         else:
             print("Signer: NOT CONFIGURED")
             print("  Add 'bunker_uri' or 'private_key_hex' to config")
-        print(f"Source URL: {config.source_url}")
-        print(f"Lookback hours: {config.lookback_hours}")
+        for source in config.sources:
+            tag_str = f", tags: {', '.join(source.tags)}" if source.tags else ""
+            print(
+                f"Source: {source.url} ({source.kind}, "
+                f"lookback {source.lookback_hours}h{tag_str})"
+            )
+        print(f"Max concurrency: {config.max_concurrency}")
+        print(f"Fetch mode: {config.fetch_mode}")
+        print(f"Content format: {config.content_format}")
+        print(f"Fetch budget: {config.fetch_budget_seconds}s")
+        print(f"Report time (--watch): {config.report_time} UTC")
+        if config.webhook_secret:
+            print(f"Webhooks: http://{config.webhook_host}:{config.webhook_port}/")
+        else:
+            print("Webhooks: not configured")
         print(f"Relays: {', '.join(config.relays)}")
         print(f"Anthropic API key: {'set' if config.anthropic_api_key else 'not set'}")
+        limits = config.summary_limits
+        print(
+            f"Summary limits: {limits.max_prompt_tokens} prompt tokens, "
+            f"{limits.chunk_tokens}-token chunks, {limits.max_map_calls} map requests "
+            f"({limits.concurrency} at once), {limits.timeout_seconds}s timeout"
+        )
         
         # Show cache info
         cache = load_cache()
@@ -97,6 +290,60 @@ def main() -> int:
             print("Cached summary: none")
         return 0
 
+    if args.serve_webhooks or args.replay_webhooks:
+        if not config.webhook_secret:
+            print("Error: No webhook secret configured", file=sys.stderr)
+            print(f'Add "webhook": {{"secret": "..."}} to {CONFIG_PATH}', file=sys.stderr)
+            return 1
+
+        if args.replay_webhooks:
+            url = f"http://{config.webhook_host}:{config.webhook_port}/"
+            statuses = replay_webhooks(url, config.webhook_secret, args.replay_webhooks)
+            return 0 if all(status == 200 for status in statuses) else 1
+
+        if not config.store_enabled:
+            print("Error: --serve-webhooks requires the local store", file=sys.stderr)
+            return 1
+        store = Store()
+        try:
+            receiver = WebhookReceiver(
+                store,
+                config.webhook_secret,
+                [s.url for s in config.sources if s.kind == SOURCE_DISCOURSE],
+                raw=config.content_format == "raw",
+            )
+            serve_webhooks(receiver, config.webhook_host, config.webhook_port)
+        finally:
+            store.close()
+        return 0
+
+    if args.backfill:
+        if not config.anthropic_api_key:
+            print("Error: --backfill requires an Anthropic API key", file=sys.stderr)
+            return 1
+        if not config.store_enabled or args.no_store:
+            print("Error: --backfill requires the local store", file=sys.stderr)
+            return 1
+        if not config.summary_cache_enabled or args.no_summary_cache:
+            print("Error: --backfill requires the summary cache", file=sys.stderr)
+            return 1
+        start, end = args.backfill
+        store = Store()
+        try:
+            backfill(
+                config.sources,
+                store,
+                start,
+                end,
+                config.anthropic_api_key,
+                SummaryCache(),
+                config.summary_limits,
+                parse_report_time(config.report_time),
+            )
+        finally:
+            store.close()
+        return 0
+
     # Check signer is configured
     if not config.bunker_uri and not config.private_key_hex:
         print("Error: No signer configured", file=sys.stderr)
@@ -105,8 +352,50 @@ def main() -> int:
         print('  "private_key_hex": "..."', file=sys.stderr)
         return 1
 
-    # Track AI failure for angry notification
-    ai_error_message = None
+    summary_cache = (
+        SummaryCache()
+        if config.summary_cache_enabled and not args.no_summary_cache
+        else None
+    )
+
+    if args.watch:
+        if not config.store_enabled or args.no_store:
+            print("Error: --watch requires the local store", file=sys.stderr)
+            return 1
+        # One summarizer (and Claude connection pool) for the whole watch,
+        # summarizing in the watch loop; only publishing needs a thread
+        summarizer = (
+            Summarizer(config.anthropic_api_key, config.summary_limits)
+            if config.anthropic_api_key
+            else None
+        )
+
+        async def report(activity: Activity) -> int:
+            output = await format_activity_async(
+                activity, config.anthropic_api_key, config.summary_limits,
+                summary_cache, summarizer,
+            )
+            return await asyncio.to_thread(
+                report_activity, config, activity, args.dry_run, args.update_profile,
+                summary_cache, output,
+            )
+
+        store = Store()
+        try:
+            watch(
+                config.sources,
+                store,
+                report,
+                parse_report_time(config.report_time),
+                config.max_concurrency,
+                http_cache=not args.no_http_cache,
+                mode=config.fetch_mode,
+                content=config.content_format,
+                budget_seconds=config.fetch_budget_seconds,
+            )
+        finally:
+            store.close()
+        return 0
 
     # Handle repost mode
     if args.repost:
@@ -149,76 +438,49 @@ def main() -> int:
             return 0
     else:
         # Fetch activity and generate new summary
-        print(f"Fetching activity from {config.source_url}...")
+        cassette = None
+        if args.record or args.replay:
+            if args.offline:
+                print("Error: --offline cannot be combined with a cassette", file=sys.stderr)
+                return 1
+            cassette = Cassette(
+                args.record or args.replay,
+                replay=args.replay is not None,
+                latency=args.replay_latency,
+            )
+
+        # Cassette runs skip the store so every run sees the same requests
+        use_store = config.store_enabled and not args.no_store and cassette is None
+        if args.offline and not use_store:
+            print("Error: --offline requires the local store", file=sys.stderr)
+            return 1
+
+        print(f"Fetching activity from {', '.join(s.url for s in config.sources)}...")
+        store = Store() if use_store else None
         try:
-            activity = fetch_activity(config.source_url, config.lookback_hours)
+            activity = fetch_sources(
+                config.sources,
+                config.max_concurrency,
+                http_cache=not args.no_http_cache,
+                mode=config.fetch_mode,
+                store=store,
+                offline=args.offline,
+                content=config.content_format,
+                budget_seconds=config.fetch_budget_seconds,
+                cassette=cassette,
+            )
         except Exception as e:
             print(f"Error fetching activity: {e}", file=sys.stderr)
             return 1
+        finally:
+            if store is not None:
+                store.close()
 
-        print(f"Found {len(activity.topics)} topics with activity")
-
-        # Format the message
-        output = format_activity(activity, config.anthropic_api_key)
-        message = output.message
-        
-        if output.ai_failed:
-            ai_error_message = output.error_message
-
-        if args.dry_run:
-            print("\n--- Message (dry run) ---")
-            print(message)
-            if ai_error_message:
-                print("\n--- AI FAILED - Would also post: ---")
-                print(ai_error_message)
-            print("--- End message ---\n")
-            return 0
-
-        # Save to cache
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        save_cache(message, today)
-        print(f"Saved summary to cache for {today}")
-
-    # Publish to Nostr
-    print(f"Publishing to {len(config.relays)} relays: {', '.join(config.relays)}")
-    try:
-        event_id = publish_note(
-            content=message,
-            relays=config.relays,
-            private_key_hex=config.private_key_hex,
-            bunker_uri=config.bunker_uri,
-            app_key_hex=config.app_key_hex,
-            update_profile=args.update_profile,
+        return report_activity(
+            config, activity, args.dry_run, args.update_profile, summary_cache
         )
-        print(f"Published! Event ID: {event_id}")
-        if config.private_key_hex:
-            npub = get_public_key(config.private_key_hex)
-            print(f"View at: https://njump.me/{npub}")
-        
-        # Record the post time
-        update_cache_posted(datetime.now(timezone.utc).isoformat())
-        
-        # If AI failed (only on fresh generate), post angry notification
-        if ai_error_message:
-            print("AI failed - posting angry notification...")
-            try:
-                angry_event_id = publish_note(
-                    content=ai_error_message,
-                    relays=config.relays,
-                    private_key_hex=config.private_key_hex,
-                    bunker_uri=config.bunker_uri,
-                    app_key_hex=config.app_key_hex,
-                    update_profile=False,
-                )
-                print(f"Angry notification posted! Event ID: {angry_event_id}")
-            except Exception as e:
-                print(f"Warning: Could not post angry notification: {e}", file=sys.stderr)
-                
-    except Exception as e:
-        print(f"Error publishing to Nostr: {e}", file=sys.stderr)
-        return 1
 
-    return 0
+    return publish_message(config, message, None, args.update_profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+"""Plan which topics need fetching before any topic request goes out."""
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .fetcher import Topic
+    from .store import TopicMark
+
+
+@dataclass
+class PlannedFetch:
+    """A topic that needs fetching, and how far back to go."""
+
+    topic: "Topic"
+    posts_back: int | None  # Newest posts to request; None means "until since"
+    from_post_number: int | None = None  # Chunk to start from, if known
+    incremental: bool = False  # True if earlier posts are already stored
+    estimated_requests: int = 1
+
+
+@dataclass
+class FetchPlan:
+    """The outcome of planning a topic fetch stage."""
+
+    fetches: list[PlannedFetch] = field(default_factory=list)
+    unchanged: list["Topic"] = field(default_factory=list)  # Served from the store
+    no_new_posts: list["Topic"] = field(default_factory=list)  # Bumped, but no posts
+
+    @property
+    def planned_requests(self) -> int:
+        return sum(f.estimated_requests for f in self.fetches)
+
+    @property
+    def topics(self) -> list["Topic"]:
+        """Topics that belong in the report (everything with new posts)."""
+        return [f.topic for f in self.fetches] + self.unchanged
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.fetches)} topics to fetch (~{self.planned_requests} requests), "
+            f"{len(self.unchanged)} unchanged, "
+            f"{len(self.no_new_posts)} bumped without new posts"
+        )
+
+
+def _estimate_requests(posts: int, batch_size: int) -> int:
+    """Requests needed to load a topic's newest posts."""
+    # The topic request itself embeds the first chunk of posts
+    return 1 + math.ceil(max(0, posts - batch_size) / batch_size)
+
+
+def has_new_posts(topic: "Topic", since: datetime) -> bool:
+    """Check whether a topic can have posts created since a time.
+
+    Discourse also bumps topics for edits, moderation and category moves;
+    last_posted_at only moves when a post is created.
+    """
+    return topic.last_posted_at >= since
+
+
+def plan_fetches(
+    topics: list["Topic"],
+    since: datetime,
+    batch_size: int,
+    marks: dict[int, "TopicMark"] | None = None,
+) -> FetchPlan:
+    """Decide which topics to fetch, using listing counters and stored marks.
+
+    Args:
+        topics: Topics from the latest listing
+        since: Start of the lookback window
+        batch_size: Posts returned per topic or post batch request
+        marks: Stored high-water marks by topic ID
+
+    Returns:
+        FetchPlan. Topics with no post since the cutoff are dropped from
+        the report; with stored marks, topics whose counters have not
+        moved are served from the store, and moved topics only request
+        the posts past the stored highest_post_number.
+    """
+    marks = marks or {}
+    plan = FetchPlan()
+
+    for topic in topics:
+        if not has_new_posts(topic, since):
+            plan.no_new_posts.append(topic)
+            continue
+
+        mark = marks.get(topic.id)
+        if mark is None:
+            plan.fetches.append(PlannedFetch(
+                topic,
+                posts_back=None,
+                estimated_requests=_estimate_requests(topic.posts_count, batch_size),
+            ))
+        elif (
+            mark.highest_post_number == topic.highest_post_number
+            and mark.posts_count == topic.posts_count
+            and mark.last_posted_ts == topic.last_posted_ts
+        ):
+            plan.unchanged.append(topic)
+        else:
+            posts_back = max(1, topic.highest_post_number - mark.highest_post_number)
+            plan.fetches.append(PlannedFetch(
+                topic,
+                posts_back=posts_back,
+                from_post_number=mark.highest_post_number + 1,
+                incremental=True,
+                estimated_requests=_estimate_requests(posts_back, batch_size),
+            ))
+
+    return plan
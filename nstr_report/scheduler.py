@@ -0,0 +1,203 @@
+"""Rate-limit-aware request scheduling for forum requests."""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+# Token bucket defaults, per host (requests per second)
+DEFAULT_RATE = 8.0
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+DEFAULT_BURST = 10
+RATE_INCREASE = 0.5  # Added to the rate after each successful request
+
+# Retry settings for throttled requests
+MAX_THROTTLE_RETRIES = 5
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+MAX_RETRY_AFTER_SECONDS = 120.0
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds.
+
+    An HTTP date is counted from now (the current time if not given).
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class HostLimiter:
+    """Token bucket plus AIMD concurrency window for a single host.
+
+    Each success grows the concurrency window by about one request per
+    window's worth of successes and adds RATE_INCREASE to the request
+    rate; each throttled response halves both and pauses the host for
+    Retry-After.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.window = float(self.max_concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._changed: asyncio.Future | None = None
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a request slot if one is free right now, without waiting."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until or self.in_flight >= int(self.window) or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.in_flight += 1
+        return True
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent to this host."""
+        while not self.try_acquire():
+            now = time.monotonic()
+            if now < self.paused_until:
+                wait = self.paused_until - now
+            elif self.in_flight >= int(self.window):
+                wait = None
+            else:
+                wait = (1 - self.tokens) / self.rate
+
+            # Sleep until a release or the computed wait, whichever is first
+            if self._changed is None or self._changed.done():
+                self._changed = asyncio.get_running_loop().create_future()
+            await asyncio.wait([self._changed], timeout=wait)
+
+    def release(
+        self,
+        throttled: bool = False,
+        retry_after: float | None = None,
+        ok: bool = True,
+    ) -> None:
+        """Record the outcome of a request and wake waiting senders.
+
+        Requests that failed for other reasons (ok=False) free their slot
+        without moving the window or rate.
+        """
+        self.in_flight -= 1
+        if throttled:
+            self.window = max(1.0, self.window / 2)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            delay = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER_SECONDS
+            delay = min(delay, MAX_RETRY_AFTER_SECONDS)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        elif ok:
+            self.window = min(self.max_concurrency, self.window + 1 / self.window)
+            self.rate = min(MAX_RATE, self.rate + RATE_INCREASE)
+
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+
+
+class RequestScheduler:
+    """Routes requests through a HostLimiter per host, retrying throttles.
+
+    With paced=False requests skip the limiter and throttled responses are
+    retried without waiting (used when there is no real server to protect,
+    e.g. replaying a cassette, whose recorded 429s are followed by the
+    recorded retries). clock supplies the time Retry-After dates are
+    counted from, e.g. the recording's time during a replay.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_retries: int = MAX_THROTTLE_RETRIES,
+        paced: bool = True,
+        clock: Callable[[], datetime] | None = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.paced = paced
+        self.clock = clock
+        self.throttled = 0
+        self._limiters: dict[str, HostLimiter] = {}
+
+    def limiter(self, host: str) -> HostLimiter:
+        """Return the limiter for a host, creating it on first use."""
+        if host not in self._limiters:
+            self._limiters[host] = HostLimiter(self.max_concurrency)
+        return self._limiters[host]
+
+    async def send(
+        self,
+        url: str,
+        request: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """Send a request under the host's limits.
+
+        Throttled responses (429/503) are retried after the server's
+        Retry-After, up to max_retries times; the last response is
+        returned if the host keeps refusing.
+        """
+        host = httpx.URL(url).host
+        limiter = self.limiter(host) if self.paced else None
+
+        for attempt in range(self.max_retries + 1):
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                response = await request()
+            except BaseException:
+                if limiter is not None:
+                    limiter.release(ok=False)
+                raise
+
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                if limiter is not None:
+                    limiter.release()
+                return response
+
+            self.throttled += 1
+            if limiter is None:
+                if attempt < self.max_retries:
+                    await response.aclose()
+                continue
+
+            now = self.clock() if self.clock is not None else None
+            retry_after = parse_retry_after(response.headers.get("retry-after"), now)
+            if retry_after is None:
+                retry_after = DEFAULT_RETRY_AFTER_SECONDS * 2 ** attempt
+            limiter.release(throttled=True, retry_after=retry_after)
+
+            if attempt < self.max_retries:
+                print(f"  Throttled by {host}, retrying in {retry_after:.1f}s")
+                await response.aclose()
+
+        return response
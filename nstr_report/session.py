@@ -0,0 +1,486 @@
+"""Shared pooled HTTP session for Discourse requests."""
+
+import asyncio
+import codecs
+import json
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import httpx
+
+from .httpcache import HTTPCache
+from .scheduler import HostLimiter, RequestScheduler
+
+if TYPE_CHECKING:
+    from .cassette import Cassette
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_MAX_CONNECTIONS = 8
+
+# Retries for connection errors, timeouts and transient server errors
+# (503 is a throttle, retried by the scheduler)
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_STATUS_CODES = (500, 502, 504)
+
+# Hedging: send a duplicate request once one is slower than this
+# percentile of recent latencies
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 10
+MIN_HEDGE_DELAY_SECONDS = 0.25
+LATENCY_WINDOW = 200
+
+# Responses at least this large are expected to arrive compressed
+MIN_COMPRESSIBLE_BYTES = 1024
+
+# Per-request transfer sizes kept for inspection
+TRANSFER_LOG_SIZE = 1000
+
+
+def accept_encoding() -> str:
+    """Content codings to request, best first.
+
+    zstd and br are only offered when their decoders (the optional
+    zstandard and brotli packages) are installed; gzip always is.
+    """
+    encodings = []
+    if find_spec("zstandard"):
+        encodings.append("zstd")
+    if find_spec("brotli") or find_spec("brotlicffi"):
+        encodings.append("br")
+    encodings.append("gzip")
+    return ", ".join(encodings)
+
+
+class FetchBudgetExceeded(Exception):
+    """Raised when a request cannot complete inside the fetch budget."""
+
+
+class FetchBudget:
+    """An overall deadline for the fetch stage."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining() <= 0
+
+
+@dataclass
+class Transfer:
+    """Body sizes of one response."""
+
+    url: str
+    encoding: str  # Content-Encoding, or "identity"
+    wire_bytes: int  # As received, before decompression
+    decoded_bytes: int
+
+
+@dataclass
+class ConnectionStats:
+    """Connection-level counters for a fetch session."""
+
+    requests: int = 0
+    connections_opened: int = 0
+    connect_seconds: float = 0.0  # Time spent in TCP connect
+    tls_seconds: float = 0.0  # Time spent in TLS handshakes
+    request_seconds: float = 0.0  # Total wall time of all requests
+    not_modified: int = 0  # Responses served from the HTTP cache via 304
+    throttled: int = 0  # 429/503 responses that were retried
+    retries: int = 0  # Requests retried after a connection or server error
+    hedged: int = 0  # Duplicate requests sent for slow requests
+    hedge_wins: int = 0  # Duplicates that finished before the original
+    requests_by_host: dict[str, int] = field(default_factory=dict)
+    bytes_received: int = 0  # Response bodies as sent on the wire
+    bytes_decoded: int = 0  # Response bodies after decompression
+    uncompressed: int = 0  # Sizeable responses sent without compression
+    transfers: deque[Transfer] = field(
+        default_factory=lambda: deque(maxlen=TRANSFER_LOG_SIZE)
+    )
+
+    @property
+    def handshake_seconds(self) -> float:
+        """Total time spent establishing connections."""
+        return self.connect_seconds + self.tls_seconds
+
+    @property
+    def reused_requests(self) -> int:
+        """Number of requests served over an already open connection."""
+        return max(0, self.requests - self.connections_opened)
+
+    @property
+    def saved_seconds(self) -> float:
+        """Estimated handshake time saved by reusing connections."""
+        if not self.connections_opened:
+            return 0.0
+        per_connection = self.handshake_seconds / self.connections_opened
+        return per_connection * self.reused_requests
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        return (
+            f"{self.requests} requests over {self.connections_opened} connections, "
+            f"handshakes {self.handshake_seconds:.2f}s, "
+            f"~{self.saved_seconds:.2f}s saved by reuse, "
+            f"{self.not_modified} not modified, {self.throttled} throttled, "
+            f"{self.retries} retried, {self.hedged} hedged ({self.hedge_wins} won), "
+            f"{self.bytes_received / 1024:.0f} KiB received "
+            f"({self.bytes_decoded / 1024:.0f} KiB decoded, {self.uncompressed} uncompressed)"
+        )
+
+
+class FetchSession:
+    """A pooled HTTP client shared by all requests in one fetch run.
+
+    Connections are kept alive and, where the server supports it,
+    multiplexed over HTTP/2, so handshake cost is paid once per run
+    rather than once per topic. Responses are requested compressed (see
+    accept_encoding) and decompressed as they stream in; wire and decoded
+    sizes are recorded per request and per session. If an HTTPCache is
+    given, JSON requests are made conditional and 304 responses are
+    served from it. Requests are paced per host by a RequestScheduler so
+    the forum's rate limiter is respected.
+
+    With a FetchBudget, every request (including time queued behind the
+    scheduler and retries) must finish before the budget's deadline or
+    FetchBudgetExceeded is raised. Requests slower on the wire than the
+    recent p95 latency get a hedged duplicate if the host has a free
+    slot, and whichever answers first wins.
+    With a Cassette, traffic is recorded to it or replayed from it, and
+    now() is the time of the recording during a replay. Use as an async
+    context manager.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        http2: bool = True,
+        cache: HTTPCache | None = None,
+        budget: FetchBudget | None = None,
+        cassette: "Cassette | None" = None,
+    ):
+        self.stats = ConnectionStats()
+        self.cache = cache
+        self.budget = budget
+        self.timeout = timeout
+        self.cassette = cassette
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.scheduler = RequestScheduler(
+            max_connections, paced=cassette is None or cassette.realtime, clock=self.now
+        )
+        transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        if cassette is not None:
+            transport = cassette.transport(transport)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            headers={"Accept": "application/json", "Accept-Encoding": accept_encoding()},
+            transport=transport,
+        )
+
+    def now(self) -> datetime:
+        """The time lookback windows end at: now, or the cassette's time."""
+        if self.cassette is not None:
+            return self.cassette.now()
+        return datetime.now(timezone.utc)
+
+    async def __aenter__(self) -> "FetchSession":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close all pooled connections and persist the HTTP cache."""
+        await self.client.aclose()
+        if self.cache is not None:
+            self.cache.save()
+
+    def _hedge_delay(self) -> float | None:
+        """Delay before hedging a request, or None if too few samples."""
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE))
+        return max(MIN_HEDGE_DELAY_SECONDS, ordered[index])
+
+    async def _within_budget(self, awaitable: Awaitable) -> Any:
+        """Await something, giving up when the fetch budget runs out."""
+        if self.budget is None:
+            return await awaitable
+        remaining = self.budget.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise FetchBudgetExceeded("fetch budget exhausted")
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise FetchBudgetExceeded("fetch budget exhausted") from None
+
+    async def _hedged(
+        self,
+        send: Callable[[], Awaitable[httpx.Response]],
+        limiter: HostLimiter,
+    ) -> httpx.Response:
+        """Send a request, racing a duplicate if it is unusually slow.
+
+        Called once the scheduler has admitted the request, so the hedge
+        delay only counts time on the wire, like the latencies it is
+        derived from. The duplicate needs a free slot of its own from
+        limiter, so nothing is hedged while the host is busy or paused
+        for Retry-After.
+        """
+        delay = self._hedge_delay()
+        primary = asyncio.ensure_future(send())
+        if delay is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and limiter.try_acquire():
+                self.stats.hedged += 1
+                hedge = asyncio.ensure_future(send())
+                # The duplicate's slot is returned without moving the window
+                hedge.add_done_callback(lambda _: limiter.release(ok=False))
+                tasks.add(hedge)
+
+            error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _count_request(self, host: str, seconds: float) -> None:
+        self.stats.requests += 1
+        self.stats.requests_by_host[host] = self.stats.requests_by_host.get(host, 0) + 1
+        self.stats.request_seconds += seconds
+
+    def _count_transfer(self, response: httpx.Response, decoded_bytes: int) -> None:
+        encoding = response.headers.get("Content-Encoding", "identity")
+        wire_bytes = response.num_bytes_downloaded
+        self.stats.bytes_received += wire_bytes
+        self.stats.bytes_decoded += decoded_bytes
+        if encoding == "identity" and wire_bytes >= MIN_COMPRESSIBLE_BYTES:
+            self.stats.uncompressed += 1
+        self.stats.transfers.append(
+            Transfer(str(response.url), encoding, wire_bytes, decoded_bytes)
+        )
+
+    async def _with_retries(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """Send a request, retrying connection and server errors within the budget.
+
+        The response to the last attempt is returned even if it is a
+        server error, for the caller to raise.
+        """
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    response = await self._within_budget(send())
+                except httpx.TransportError:
+                    if attempt == MAX_RETRIES:
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                        return response
+                    await response.aclose()
+                self.stats.retries += 1
+                await self._within_budget(
+                    asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                )
+        finally:
+            self.stats.throttled = self.scheduler.throttled
+
+    async def _read_bytes(self, response: httpx.Response) -> bytes:
+        content = await response.aread()
+        self._count_transfer(response, len(content))
+        return content
+
+    async def _read_text(self, response: httpx.Response) -> str:
+        # Chunks are decoded as they arrive, so the body is held once, as
+        # text, rather than as bytes and then text
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")("replace")
+        parts: list[str] = []
+        decoded_bytes = 0
+        async for chunk in response.aiter_bytes():
+            decoded_bytes += len(chunk)
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        self._count_transfer(response, decoded_bytes)
+        return "".join(parts)
+
+    async def _send_get(
+        self,
+        url: str,
+        read: Callable[[httpx.Response], Awaitable[T]],
+        **kwargs: Any,
+    ) -> tuple[httpx.Response, T]:
+        """Send a GET request, reading the streamed body with read.
+
+        The body is read inside the request, so hedging and latencies
+        cover the whole transfer. Returns the closed response and what
+        read returned for it.
+        """
+        started: dict[str, float] = {}
+
+        async def trace(event_name: str, info: dict) -> None:
+            now = time.monotonic()
+            if event_name.endswith(".started"):
+                started[event_name[: -len(".started")]] = now
+            elif event_name == "connection.connect_tcp.complete":
+                self.stats.connections_opened += 1
+                self.stats.connect_seconds += now - started.get("connection.connect_tcp", now)
+            elif event_name == "connection.start_tls.complete":
+                self.stats.tls_seconds += now - started.get("connection.start_tls", now)
+
+        host = httpx.URL(url).host
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = trace
+        # Bodies by response; a hedged request reads two
+        bodies: dict[int, T] = {}
+
+        async def request() -> httpx.Response:
+            timeout = self.timeout
+            if self.budget is not None:
+                timeout = min(timeout, self.budget.remaining())
+            start = time.monotonic()
+            try:
+                response = await self.client.send(
+                    self.client.build_request(
+                        "GET", url, extensions=extensions, timeout=timeout, **kwargs
+                    ),
+                    stream=True,
+                )
+                try:
+                    bodies[id(response)] = await read(response)
+                finally:
+                    await response.aclose()
+            finally:
+                self._count_request(host, time.monotonic() - start)
+            self._latencies.append(time.monotonic() - start)
+            return response
+
+        limiter = self.scheduler.limiter(host)
+
+        async def send() -> httpx.Response:
+            return await self.scheduler.send(url, lambda: self._hedged(request, limiter))
+
+        response = await self._with_retries(send)
+        return response, bodies[id(response)]
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a GET request, recording connection timings.
+
+        Connection errors, timeouts and transient server errors (500,
+        502, 504) are retried up to MAX_RETRIES times with exponential
+        backoff, within the fetch budget. The response's body is read
+        into response.content.
+        """
+        response, _ = await self._send_get(url, self._read_bytes, **kwargs)
+        return response
+
+    async def get_text(self, url: str, **kwargs: Any) -> tuple[httpx.Response, str]:
+        """Send a GET request as get() does, decoding the body to text as it streams.
+
+        Returns the response (whose content is not kept) and its text.
+        """
+        return await self._send_get(url, self._read_text, **kwargs)
+
+    async def stream_bytes(self, url: str, **kwargs: Any) -> AsyncIterator[bytes]:
+        """Stream a GET response body in chunks as they arrive.
+
+        Throttling, retries and the fetch budget apply as in get(), but the
+        body is never buffered whole, cached or hedged. Use with
+        contextlib.aclosing so the response is closed if iteration stops
+        early.
+        """
+        host = httpx.URL(url).host
+
+        async def request() -> httpx.Response:
+            timeout = self.timeout
+            if self.budget is not None:
+                timeout = min(timeout, self.budget.remaining())
+            start = time.monotonic()
+            try:
+                return await self.client.send(
+                    self.client.build_request("GET", url, timeout=timeout, **kwargs),
+                    stream=True,
+                )
+            finally:
+                self._count_request(host, time.monotonic() - start)
+
+        response = await self._with_retries(lambda: self.scheduler.send(url, request))
+        decoded_bytes = 0
+        try:
+            response.raise_for_status()
+            chunks = response.aiter_bytes()
+            while True:
+                try:
+                    chunk = await self._within_budget(anext(chunks))
+                except StopAsyncIteration:
+                    return
+                decoded_bytes += len(chunk)
+                yield chunk
+        finally:
+            await response.aclose()
+            self._count_transfer(response, decoded_bytes)
+
+    async def get_json(self, url: str, **kwargs: Any) -> Any:
+        """Send a GET request and decode the JSON body.
+
+        The body is decoded to text as it streams in and parsed from
+        that, so no bytes copy of it is kept. With a cache, the request
+        carries the stored validators, and a 304 response returns the
+        cached body without downloading or decoding it.
+        """
+        if self.cache is None:
+            response, text = await self.get_text(url, **kwargs)
+            response.raise_for_status()
+            return json.loads(text)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        conditional = {**headers, **self.cache.conditional_headers(url)}
+        response, text = await self.get_text(url, headers=conditional, **kwargs)
+
+        if response.status_code == 304:
+            data = self.cache.load(url)
+            if data is not None:
+                self.stats.not_modified += 1
+                return data
+            # Cache entry vanished; refetch unconditionally
+            response, text = await self.get_text(url, headers=headers, **kwargs)
+
+        response.raise_for_status()
+        data = json.loads(text)
+        self.cache.store(url, response.headers, text, data)
+        return data
@@ -0,0 +1,365 @@
+"""Source adapters: pluggable ways of turning a forum or feed into topics."""
+
+import asyncio
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from .feed import FeedEntry, iter_feed_entries
+from .fetcher import (
+    CONTENT_COOKED,
+    CONTENT_RAW,
+    DEFAULT_MAX_CONCURRENCY,
+    FETCH_MODE_POSTS,
+    FETCH_MODE_TOPICS,
+    Activity,
+    Post,
+    Topic,
+    assemble_activity,
+    fetch_activity_async,
+    filter_tags,
+    iter_topics_mode,
+)
+from .httpcache import HTTPCache
+from .session import FetchBudget, FetchBudgetExceeded, FetchSession
+from .text import html_to_text
+
+if TYPE_CHECKING:
+    from .cassette import Cassette
+    from .store import Store
+
+# Source kinds: Discourse JSON API, or any RSS/Atom feed
+SOURCE_DISCOURSE = "discourse"
+SOURCE_FEED = "feed"
+SOURCE_KINDS = (SOURCE_DISCOURSE, SOURCE_FEED)
+
+FEED_ACCEPT = "application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8"
+
+# Discourse post and topic links: /t/{slug}/{topic_id}[/{post_number}]
+_DISCOURSE_LINK_RE = re.compile(r"^(.*/t/([^/]+)/(\d+))(?:/(\d+))?/?$")
+_DISCOURSE_POST_GUID_RE = re.compile(r"-post-(\d+)$")
+
+
+@dataclass
+class ForumSource:
+    """A forum or feed to fetch, with its own window and tag filter."""
+
+    url: str
+    lookback_hours: int = 24
+    tags: tuple[str, ...] = ()  # Only keep topics with any of these tags
+    kind: str = SOURCE_DISCOURSE
+
+
+class SourceAdapter(ABC):
+    """Turns one source into Topic objects carrying their recent posts.
+
+    Implementations only need iter_topics; fetch collects it into an
+    Activity and syncs the store.
+    """
+
+    def __init__(self, source: ForumSource):
+        self.source = source
+
+    def cutoff(self, now: datetime | None = None) -> datetime:
+        """Start of this source's lookback window ending at now (default: the current time)."""
+        now = now or datetime.now(timezone.utc)
+        return now - timedelta(hours=self.source.lookback_hours)
+
+    @abstractmethod
+    def iter_topics(self, session: FetchSession) -> AsyncIterator[Topic]:
+        """Yield topics with posts inside the lookback window, as they are read."""
+
+    async def fetch(
+        self,
+        session: FetchSession | None,
+        store: "Store | None" = None,
+        offline: bool = False,
+    ) -> Activity:
+        """Collect this source's topics into an Activity.
+
+        If the fetch budget runs out after some topics were read, those
+        are kept and marked incomplete.
+        """
+        now = session.now() if session is not None else datetime.now(timezone.utc)
+        cutoff = self.cutoff(now)
+        if offline:
+            if store is None:
+                raise ValueError("Offline fetch requires a store")
+            activity = store.build_activity(self.source.url, cutoff)
+            activity.topics = filter_tags(activity.topics, self.source.tags)
+            return activity
+
+        topics = []
+        try:
+            async for topic in self.iter_topics(session):
+                topics.append(topic)
+        except FetchBudgetExceeded as e:
+            if not topics:
+                raise
+            for topic in topics:
+                topic.fetch_error = str(e)
+
+        topics = filter_tags(topics, self.source.tags)
+        return assemble_activity(
+            self.source.url, cutoff, topics, store, self.source.tags, now
+        )
+
+
+class DiscourseAdapter(SourceAdapter):
+    """Discourse JSON API, via fetch_activity_async.
+
+    In topics mode iter_topics yields each topic as soon as its posts are
+    fetched; in posts mode, once the posts feed has been walked.
+    """
+
+    def __init__(
+        self,
+        source: ForumSource,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        mode: str = FETCH_MODE_TOPICS,
+        content: str = CONTENT_COOKED,
+    ):
+        super().__init__(source)
+        self.max_concurrency = max_concurrency
+        self.mode = mode
+        self.content = content
+
+    async def iter_topics(self, session: FetchSession) -> AsyncIterator[Topic]:
+        if self.mode == FETCH_MODE_POSTS:
+            # A topic's posts are only known once the whole feed is walked
+            activity = await self.fetch(session)
+            for topic in activity.topics:
+                yield topic
+            return
+
+        topics = iter_topics_mode(
+            session, self.source.url, self.cutoff(session.now()), self.max_concurrency,
+            raw=self.content == CONTENT_RAW, tags=self.source.tags,
+        )
+        async with aclosing(topics):
+            async for topic in topics:
+                yield topic
+
+    async def fetch(
+        self,
+        session: FetchSession | None,
+        store: "Store | None" = None,
+        offline: bool = False,
+    ) -> Activity:
+        # The topic planner and store sync live in fetch_activity_async
+        return await fetch_activity_async(
+            self.source.url, self.source.lookback_hours, self.max_concurrency, session,
+            mode=self.mode, store=store, offline=offline, content=self.content,
+            tags=self.source.tags,
+        )
+
+
+def _stable_id(key: str) -> int:
+    """Derive a stable integer ID from a feed entry key."""
+    return int(hashlib.sha1(key.encode()).hexdigest()[:12], 16)
+
+
+def _entry_post(entry: FeedEntry, post_number: int) -> Post:
+    match = _DISCOURSE_POST_GUID_RE.search(entry.id)
+    return Post(
+        id=int(match.group(1)) if match else _stable_id(entry.id),
+        author=entry.author.lstrip("@"),
+        content=html_to_text(entry.content),
+        created_at=entry.published,
+        post_number=post_number,
+    )
+
+
+class FeedAdapter(SourceAdapter):
+    """RSS 2.0 or Atom feed, parsed incrementally as it downloads.
+
+    Entries linking to a Discourse post (as in Discourse's posts.rss) are
+    grouped into their topic, which is yielded once the feed ends; any
+    other entry becomes a single-post topic and is yielded immediately.
+    """
+
+    async def iter_topics(self, session: FetchSession) -> AsyncIterator[Topic]:
+        cutoff = self.cutoff(session.now())
+        url = self.source.url
+        grouped: dict[int, Topic] = {}
+
+        chunks = session.stream_bytes(url, headers={"Accept": FEED_ACCEPT})
+        async with aclosing(chunks), aclosing(iter_feed_entries(chunks)) as entries:
+            async for entry in entries:
+                if entry.published < cutoff:
+                    continue
+
+                match = _DISCOURSE_LINK_RE.match(entry.link)
+                if match is None:
+                    yield Topic(
+                        id=_stable_id(entry.id),
+                        title=entry.title,
+                        slug="",
+                        author=entry.author.lstrip("@"),
+                        posts_count=1,
+                        highest_post_number=1,
+                        last_posted_at=entry.published,
+                        bumped_at=entry.published,
+                        created_at=entry.published,
+                        tags=entry.categories,
+                        url=entry.link,
+                        posts=[_entry_post(entry, 1)],
+                        source_url=url,
+                    )
+                    continue
+
+                topic_url, slug, topic_id, post_number = match.groups()
+                post = _entry_post(entry, int(post_number or 1))
+                topic = grouped.get(int(topic_id))
+                if topic is None:
+                    topic = grouped[int(topic_id)] = Topic(
+                        id=int(topic_id),
+                        title=entry.title,
+                        slug=slug,
+                        author="unknown",
+                        posts_count=0,
+                        last_posted_at=post.created_ts,
+                        bumped_at=post.created_ts,
+                        created_at=post.created_ts,
+                        tags=entry.categories,
+                        url=topic_url,
+                        source_url=url,
+                    )
+                topic.posts.append(post)
+                topic.highest_post_number = max(topic.highest_post_number, post.post_number)
+                topic.posts_count = topic.highest_post_number
+                topic.last_posted_ts = max(topic.last_posted_ts, post.created_ts)
+                topic.bumped_ts = topic.last_posted_ts
+                topic.created_ts = min(topic.created_ts, post.created_ts)
+                if post.post_number == 1:
+                    topic.author = post.author
+
+        for topic in grouped.values():
+            topic.posts.sort(key=lambda p: p.post_number)
+            yield topic
+
+
+def make_adapter(
+    source: ForumSource,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    mode: str = FETCH_MODE_TOPICS,
+    content: str = CONTENT_COOKED,
+) -> SourceAdapter:
+    """Build the adapter for a source's kind."""
+    if source.kind == SOURCE_DISCOURSE:
+        return DiscourseAdapter(source, max_concurrency, mode, content)
+    if source.kind == SOURCE_FEED:
+        return FeedAdapter(source)
+    raise ValueError(f"Unknown source kind: {source.kind}")
+
+
+async def fetch_sources_async(
+    sources: list[ForumSource],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    session: FetchSession | None = None,
+    http_cache: bool = True,
+    mode: str = FETCH_MODE_TOPICS,
+    store: "Store | None" = None,
+    offline: bool = False,
+    content: str = CONTENT_COOKED,
+    budget_seconds: float | None = None,
+    cassette: "Cassette | None" = None,
+) -> Activity:
+    """Fetch several sources concurrently and merge them into one Activity.
+
+    All sources share one session (and so one connection pool, HTTP cache
+    and fetch budget); each is paced by its own host limiter and gets
+    max_concurrency topic requests of its own, so a slow forum does not
+    hold connections the others need. A source that fails is recorded in
+    failed_sources instead of failing the whole run.
+
+    Args:
+        sources: Forums and feeds to fetch, each with its own lookback and
+            tag filter
+        max_concurrency: Maximum topic requests in flight per forum
+        session: Shared fetch session; a new one is opened if not given
+
+    The remaining arguments are as for fetch_activity_async.
+
+    Returns:
+        Activity with the topics of every source, each topic attributed
+        via its source_url, sorted by most recent activity.
+
+    Raises:
+        The first source's error if every source failed.
+    """
+    if not sources:
+        raise ValueError("No sources configured")
+
+    if session is None and not offline:
+        cache = HTTPCache() if http_cache and cassette is None else None
+        budget = FetchBudget(budget_seconds) if budget_seconds else None
+        async with FetchSession(
+            max_connections=max_concurrency * len(sources),
+            cache=cache,
+            budget=budget,
+            cassette=cassette,
+        ) as session:
+            activity = await fetch_sources_async(
+                sources, max_concurrency, session,
+                mode=mode, store=store, content=content,
+            )
+        print(f"HTTP: {session.stats.summary()}")
+        return activity
+
+    adapters = [make_adapter(source, max_concurrency, mode, content) for source in sources]
+    results = await asyncio.gather(
+        *(adapter.fetch(session, store, offline) for adapter in adapters),
+        return_exceptions=True,
+    )
+
+    # The same forum may be listed more than once with different filters
+    topics: dict[tuple[str, int], Topic] = {}
+    failed: dict[str, str] = {}
+    errors: list[Exception] = []
+    for source, result in zip(sources, results):
+        if isinstance(result, Exception):
+            print(f"Warning: Could not fetch {source.url}: {result}")
+            failed[source.url] = str(result) or type(result).__name__
+            errors.append(result)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            for topic in result.topics:
+                topics.setdefault((topic.source_url, topic.id), topic)
+
+    if len(errors) == len(sources):
+        raise errors[0]
+
+    return Activity(
+        topics=sorted(topics.values(), key=lambda t: t.bumped_ts, reverse=True),
+        fetched_at=session.now() if session is not None else datetime.now(timezone.utc),
+        source_url=", ".join(dict.fromkeys(source.url for source in sources)),
+        failed_sources=failed,
+    )
+
+
+def fetch_sources(
+    sources: list[ForumSource],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    http_cache: bool = True,
+    mode: str = FETCH_MODE_TOPICS,
+    store: "Store | None" = None,
+    offline: bool = False,
+    content: str = CONTENT_COOKED,
+    budget_seconds: float | None = None,
+    cassette: "Cassette | None" = None,
+) -> Activity:
+    """Synchronous wrapper for fetch_sources_async."""
+    return asyncio.run(
+        fetch_sources_async(
+            sources, max_concurrency,
+            http_cache=http_cache, mode=mode, store=store, offline=offline,
+            content=content, budget_seconds=budget_seconds, cassette=cassette,
+        )
+    )
@@ -0,0 +1,246 @@
+"""Local SQLite mirror of forum topics and posts."""
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .fetcher import Activity, Post, Topic
+
+STORE_PATH = Path.home() / ".cache" / "nstr-report" / "store.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    source_url TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    author TEXT NOT NULL,
+    posts_count INTEGER NOT NULL,
+    highest_post_number INTEGER NOT NULL,
+    last_posted_at INTEGER NOT NULL,
+    bumped_at INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (source_url, id)
+);
+CREATE TABLE IF NOT EXISTS posts (
+    source_url TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    topic_id INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    post_number INTEGER NOT NULL,
+    PRIMARY KEY (source_url, id)
+);
+CREATE INDEX IF NOT EXISTS posts_by_time ON posts (source_url, created_at);
+CREATE INDEX IF NOT EXISTS posts_by_topic ON posts (source_url, topic_id);
+"""
+
+
+@dataclass
+class TopicMark:
+    """High-water marks recorded for a stored topic."""
+
+    highest_post_number: int
+    posts_count: int
+    last_posted_ts: int  # Epoch seconds
+
+
+def _ts(dt: datetime) -> int:
+    return int(dt.timestamp())
+
+
+class Store:
+    """SQLite store of topics and posts with per-topic high-water marks.
+
+    Lets a run request only topics whose counters moved since the last
+    run, and build an Activity for any window without touching the
+    network. The database runs in WAL mode so readers never block the
+    writer.
+    """
+
+    def __init__(self, path: Path = STORE_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def topic_marks(self, source_url: str) -> dict[int, TopicMark]:
+        """Return high-water marks for every stored topic of a source."""
+        rows = self.conn.execute(
+            "SELECT id, highest_post_number, posts_count, last_posted_at "
+            "FROM topics WHERE source_url = ?",
+            (source_url,),
+        )
+        return {
+            topic_id: TopicMark(highest, posts_count, int(last_posted_at))
+            for topic_id, highest, posts_count, last_posted_at in rows
+        }
+
+    def post_ids(self, source_url: str, topic_id: int) -> set[int]:
+        """Return IDs of all stored posts of a topic."""
+        rows = self.conn.execute(
+            "SELECT id FROM posts WHERE source_url = ? AND topic_id = ?",
+            (source_url, topic_id),
+        )
+        return {post_id for (post_id,) in rows}
+
+    def save_topic(self, source_url: str, topic: Topic) -> None:
+        """Insert or update a topic and all of its posts."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO topics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source_url, topic.id, topic.title, topic.slug, topic.author,
+                    topic.posts_count, topic.highest_post_number,
+                    topic.last_posted_ts, topic.bumped_ts,
+                    topic.created_ts, json.dumps(topic.tags), topic.url,
+                ),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        source_url, post.id, topic.id, post.author, post.content,
+                        post.created_ts, post.post_number,
+                    )
+                    for post in topic.posts
+                ],
+            )
+
+    def _insert_stub(self, source_url: str, topic: Topic) -> None:
+        """Insert a topic row with empty high-water marks, if it is missing."""
+        self.conn.execute(
+            "INSERT OR IGNORE INTO topics VALUES (?, ?, ?, ?, ?, 0, 0, 0, ?, ?, ?, ?)",
+            (
+                source_url, topic.id, topic.title, topic.slug, topic.author,
+                topic.bumped_ts, topic.created_ts, json.dumps(topic.tags), topic.url,
+            ),
+        )
+
+    def save_topic_metadata(self, source_url: str, topic: Topic) -> None:
+        """Insert or update a topic's metadata, leaving its marks alone.
+
+        Used for pushed topics: only posts that were actually stored may
+        advance the high-water marks.
+        """
+        with self.conn:
+            self._insert_stub(source_url, topic)
+            self.conn.execute(
+                "UPDATE topics SET title = ?, slug = ?, author = ?, created_at = ?, "
+                "tags = ?, url = ?, bumped_at = MAX(bumped_at, ?) "
+                "WHERE source_url = ? AND id = ?",
+                (
+                    topic.title, topic.slug, topic.author, topic.created_ts,
+                    json.dumps(topic.tags), topic.url, topic.bumped_ts,
+                    source_url, topic.id,
+                ),
+            )
+
+    def save_post(self, source_url: str, topic: Topic, post: Post, new: bool = True) -> None:
+        """Insert or update a single pushed post.
+
+        The topic row is created from topic if missing. A new post only
+        advances the topic's high-water marks if it directly follows the
+        stored highest_post_number, so a gap left by a missed push is
+        still fetched by the next pull.
+        """
+        with self.conn:
+            self._insert_stub(source_url, topic)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source_url, post.id, topic.id, post.author, post.content,
+                    post.created_ts, post.post_number,
+                ),
+            )
+            if not new:
+                return
+            self.conn.execute(
+                "UPDATE topics SET bumped_at = MAX(bumped_at, ?) "
+                "WHERE source_url = ? AND id = ?",
+                (post.created_ts, source_url, topic.id),
+            )
+            self.conn.execute(
+                "UPDATE topics SET highest_post_number = ?, posts_count = posts_count + 1, "
+                "last_posted_at = MAX(last_posted_at, ?) "
+                "WHERE source_url = ? AND id = ? AND highest_post_number = ?",
+                (
+                    post.post_number, post.created_ts,
+                    source_url, topic.id, post.post_number - 1,
+                ),
+            )
+
+    def build_activity(
+        self,
+        source_url: str,
+        since: datetime,
+        until: datetime | None = None,
+    ) -> Activity:
+        """Build an Activity for a time window purely from stored data.
+
+        Includes topics last posted to inside the window or with stored
+        posts in it, each carrying only the posts created inside the
+        window. Topics only bumped (edits, moderation, moves) are left out.
+        """
+        until = until or datetime.now(timezone.utc)
+        window = (source_url, _ts(since), _ts(until))
+
+        topics: dict[int, Topic] = {}
+        rows = self.conn.execute(
+            "SELECT id, title, slug, author, posts_count, highest_post_number, "
+            "last_posted_at, bumped_at, created_at, tags, url FROM topics "
+            "WHERE source_url = ? AND ((last_posted_at >= ? AND last_posted_at < ?) OR id IN "
+            "(SELECT topic_id FROM posts WHERE source_url = ? "
+            "AND created_at >= ? AND created_at < ?))",
+            window + window,
+        )
+        for row in rows:
+            topics[row[0]] = Topic(
+                id=row[0],
+                title=row[1],
+                slug=row[2],
+                author=row[3],
+                posts_count=row[4],
+                highest_post_number=row[5],
+                last_posted_at=int(row[6]),
+                bumped_at=int(row[7]),
+                created_at=int(row[8]),
+                tags=json.loads(row[9]),
+                url=row[10],
+                source_url=source_url,
+            )
+
+        rows = self.conn.execute(
+            "SELECT id, topic_id, author, content, created_at, post_number FROM posts "
+            "WHERE source_url = ? AND created_at >= ? AND created_at < ? "
+            "ORDER BY topic_id, post_number",
+            window,
+        )
+        for post_id, topic_id, author, content, created_at, post_number in rows:
+            if topic_id in topics:
+                topics[topic_id].posts.append(
+                    Post(
+                        id=post_id,
+                        author=author,
+                        content=content,
+                        created_at=int(created_at),
+                        post_number=post_number,
+                    )
+                )
+
+        return Activity(
+            topics=sorted(topics.values(), key=lambda t: t.bumped_ts, reverse=True),
+            fetched_at=until,
+            source_url=source_url,
+        )
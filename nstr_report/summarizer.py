@@ -0,0 +1,722 @@
+"""Token-budgeted summarization of a day's activity with Claude."""
+
+import asyncio
+import copy
+import math
+import random
+from dataclasses import dataclass, field
+
+import anthropic
+
+from .fetcher import Activity, Post, Topic
+from .scheduler import parse_retry_after
+from .summarycache import SummaryCache, summary_key
+
+MODEL = "claude-sonnet-4-20250514"
+
+# Part of every summary cache key; bump when prompts or their handling
+# change in a way the prompt text does not show
+PROMPT_VERSION = "2"
+
+# Rough size of a token in characters; forum text with logs, hashes and
+# addresses tokenizes worse than prose, so this errs on the high side
+CHARS_PER_TOKEN = 3.5
+
+# Output limits for the final summary and for each topic's notes
+SUMMARY_MAX_TOKENS = 600
+NOTES_MAX_TOKENS = 400
+
+# Expected size of one topic's notes in the reduce prompt
+NOTES_TOKENS = 250
+
+# With a summary cache, topics at least this large are condensed to notes
+# even on days that fit in one request, so later runs only re-condense the
+# topics that changed
+CACHED_NOTES_MIN_TOKENS = 1500
+
+# Retries for rate-limited (429), overloaded (529) and other server errors
+# (5xx), timeouts (408) and lock conflicts (409), as well as connection
+# errors and timeouts, with jittered exponential backoff starting at
+# API_BACKOFF_SECONDS
+RETRY_STATUS_CODES = (408, 409, 429)
+MAX_API_RETRIES = 5
+API_BACKOFF_SECONDS = 2.0
+MAX_API_BACKOFF_SECONDS = 60.0
+
+SUMMARY_INSTRUCTIONS = """Write a concise but informative summary for Bitcoin developers and network operators. Include:
+1. Key observations or findings reported
+2. Any security concerns or attacks discussed
+3. Notable technical details or data shared
+4. Action items or recommendations if any
+
+Keep the summary under 280 characters if there's only 1-2 posts, otherwise keep it under 500 characters. Be direct and technical. Do not use emojis. Do not use markdown formatting."""
+
+# Between topics in one prompt
+TOPIC_SEPARATOR = "\n---\n\n"
+
+# Marks a part of a split topic; independent of the part's position, so a
+# part's prompt (and cache key) stays the same as later parts are added
+PART_NOTE = "(Only some of this topic's new posts; the rest are condensed separately.)"
+
+NOTES_INSTRUCTIONS = """Write dense factual notes on the posts for a later daily summary. Keep observations and findings, security concerns or attacks, concrete technical details (versions, addresses, ASNs, counts, timings) and action items, attributed to their authors where it matters. Use at most 150 words of plain text. Do not use markdown formatting."""
+
+# Shared by every request and marked for prompt caching, so map and reduce
+# requests reuse one cached prefix. The API only caches prefixes of at
+# least 1024 tokens (Sonnet); shorter ones are sent uncached, which the
+# usage log shows as zero cache reads and writes.
+SYSTEM_PROMPT = f"""You summarize activity from the Bitcoin Network Operations Collective (BNOC) forum - a technical forum for Bitcoin network operators and developers.
+
+When asked for notes on a discussion:
+{NOTES_INSTRUCTIONS}
+
+When asked for the daily summary:
+{SUMMARY_INSTRUCTIONS}"""
+
+SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+]
+
+
+@dataclass
+class SummaryLimits:
+    """Bounds on the size, cost and latency of summarizing one day."""
+
+    max_prompt_tokens: int = 50_000  # Larger days are summarized map-reduce
+    chunk_tokens: int = 20_000  # Input size of each map request
+    max_map_calls: int = 16  # Cost cap; older posts are dropped beyond it
+    concurrency: int = 4  # Requests in flight at once
+    timeout_seconds: float = 120.0  # Per request
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def format_post_for_llm(post: Post) -> str:
+    """Format one post as it appears in prompts."""
+    timestamp = post.created_at.strftime("%Y-%m-%d %H:%M UTC")
+    return f"### Post by {post.author} ({timestamp}):\n{post.content}\n"
+
+
+def format_topic_for_llm(topic: Topic, posts: list[Post] | None = None, note: str = "") -> str:
+    """Format a topic and its posts (all of them by default) for prompts."""
+    lines = [
+        f"## Topic: {topic.title}",
+        f"Forum: {topic.source_url}",
+        f"Tags: {', '.join(topic.tags) if topic.tags else 'none'}",
+        f"URL: {topic.url}",
+        "",
+    ]
+    if note:
+        lines += [note, ""]
+    lines += [format_post_for_llm(post) for post in (topic.posts if posts is None else posts)]
+    return "\n".join(lines)
+
+
+def _fit_post(post: Post, max_tokens: int) -> Post:
+    """Cut a post's content short if it alone exceeds max_tokens."""
+    if estimate_tokens(format_post_for_llm(post)) <= max_tokens:
+        return post
+    cut = int(max_tokens * CHARS_PER_TOKEN * 0.9)
+    return Post(
+        id=post.id,
+        author=post.author,
+        content=post.content[:cut] + " [...]",
+        created_at=post.created_ts,
+        post_number=post.post_number,
+    )
+
+
+@dataclass
+class TopicPart:
+    """Some of a topic's posts."""
+
+    topic: Topic
+    posts: list[Post]
+    index: int  # 1-based, oldest part first
+    count: int
+
+    def text(self) -> str:
+        return format_topic_for_llm(self.topic, self.posts, PART_NOTE if self.count > 1 else "")
+
+
+@dataclass
+class MapPart:
+    """The input of one map request.
+
+    Usually one part of a topic; topics too small to fill a request on
+    their own are packed together.
+    """
+
+    pieces: list[TopicPart]
+
+    @property
+    def topics(self) -> list[Topic]:
+        return [piece.topic for piece in self.pieces]
+
+    @property
+    def posts(self) -> list[Post]:
+        return [post for piece in self.pieces for post in piece.posts]
+
+    def text(self) -> str:
+        return TOPIC_SEPARATOR.join(piece.text() for piece in self.pieces)
+
+
+def split_topic(topic: Topic, chunk_tokens: int) -> list[TopicPart]:
+    """Split a topic's posts into parts of at most chunk_tokens.
+
+    Posts are packed oldest first, so new posts only change the last
+    part and earlier parts keep hitting the summary cache.
+    """
+    if not topic.posts:
+        return []
+    header_tokens = estimate_tokens(format_topic_for_llm(topic, [], PART_NOTE))
+    budget = max(1, chunk_tokens - header_tokens)
+
+    groups: list[list[Post]] = [[]]
+    used = 0
+    for post in topic.posts:
+        post = _fit_post(post, budget)
+        tokens = estimate_tokens(format_post_for_llm(post))
+        if groups[-1] and used + tokens > budget:
+            groups.append([])
+            used = 0
+        groups[-1].append(post)
+        used += tokens
+    return [TopicPart(topic, posts, i + 1, len(groups)) for i, posts in enumerate(groups)]
+
+
+def pack_parts(
+    pieces: list[tuple[int, TopicPart]], chunk_tokens: int, max_parts: int
+) -> list[MapPart]:
+    """Pack topic parts, with their token counts, into map requests of at most chunk_tokens.
+
+    Each part gets a request of its own, so its notes are cached on their
+    own, unless that makes more than max_parts requests. Then they are
+    packed first fit, largest first: full parts of split topics still get
+    a request each, and small topics share one.
+    """
+    if len(pieces) <= max_parts:
+        return [MapPart([piece]) for _, piece in pieces]
+    parts: list[MapPart] = []
+    used: list[int] = []
+    for tokens, piece in sorted(pieces, key=lambda item: -item[0]):
+        for i, part in enumerate(parts):
+            if used[i] + tokens <= chunk_tokens:
+                part.pieces.append(piece)
+                used[i] += tokens
+                break
+        else:
+            parts.append(MapPart([piece]))
+            used.append(tokens)
+    return parts
+
+
+@dataclass
+class SummaryPlan:
+    """How a day's activity will be summarized.
+
+    Topics in inline go into the final prompt verbatim (trimmed of their
+    oldest posts if the prompt would not fit otherwise); topics in parts
+    are first condensed to notes by parallel map requests.
+    """
+
+    activity: Activity
+    estimated_tokens: int  # The whole day as a single prompt
+    inline: list[Topic] = field(default_factory=list)
+    parts: list[MapPart] = field(default_factory=list)
+    omitted_posts: int = 0  # Older posts dropped to respect the limits
+    trimmed_topics: list[Topic] = field(default_factory=list)  # Lost some posts
+    omitted_topics: list[Topic] = field(default_factory=list)  # Left out entirely
+
+    @property
+    def map_reduce(self) -> bool:
+        return bool(self.parts)
+
+    @property
+    def mapped_topics(self) -> list[Topic]:
+        topics = (topic for part in self.parts for topic in part.topics)
+        return list({id(topic): topic for topic in topics}.values())
+
+    def map_tokens(self) -> int:
+        """Estimated input tokens of all map requests together."""
+        system = estimate_tokens(SYSTEM_PROMPT)
+        return sum(estimate_tokens(build_notes_prompt(part)) + system for part in self.parts)
+
+    def reduce_tokens(self) -> int:
+        """Estimated input tokens of the final request."""
+        notes = self.notes([""] * len(self.parts))
+        return (
+            estimate_tokens(SYSTEM_PROMPT)
+            + estimate_tokens(build_summary_prompt(self.activity, self.inline, notes))
+            + NOTES_TOKENS * len(self.parts)
+        )
+
+    def notes(self, part_notes: list[str]) -> list[tuple[list[Topic], str]]:
+        """Group the notes of each part by the topics they cover.
+
+        The notes on the parts of one split topic are listed together.
+        """
+        notes: dict[tuple[int, ...], tuple[list[Topic], list[str]]] = {}
+        for part, text in zip(self.parts, part_notes):
+            topics = list({id(topic): topic for topic in part.topics}.values())
+            notes.setdefault(tuple(id(t) for t in topics), (topics, []))[1].append(text)
+        return [(topics, "\n\n".join(texts)) for topics, texts in notes.values()]
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        omitted = ""
+        if self.omitted_posts:
+            omitted = f", {self.omitted_posts} older posts omitted"
+            if self.omitted_topics:
+                omitted += f" ({len(self.omitted_topics)} topics entirely)"
+        if not self.map_reduce:
+            return f"~{self.estimated_tokens} tokens in a single request{omitted}"
+        return (
+            f"~{self.estimated_tokens} tokens: {len(self.parts)} map requests "
+            f"for {len(self.mapped_topics)} topics (~{self.map_tokens()} tokens), "
+            f"{len(self.inline)} topics inline, reduce ~{self.reduce_tokens()} tokens{omitted}"
+        )
+
+    def omissions(self) -> str | None:
+        """What was left out to respect the limits, if anything."""
+        if not self.omitted_posts:
+            return None
+        lines = [f"{self.omitted_posts} older posts left out of the summary"]
+        lines += [f"  {topic.title} (older posts)" for topic in self.trimmed_topics]
+        lines += [f"  {topic.title} (entirely)" for topic in self.omitted_topics]
+        return "\n".join(lines)
+
+
+def _trim_inline(plan: SummaryPlan, max_tokens: int) -> None:
+    """Drop the oldest posts of the largest inline topics until the final prompt fits."""
+    # Trimmed copies replace topics in plan.inline; the activity is left as is
+    originals = {id(topic): topic for topic in plan.inline}
+    sizes = {id(topic): estimate_tokens(format_topic_for_llm(topic)) for topic in plan.inline}
+    excess = plan.reduce_tokens() - max_tokens
+    while plan.inline and excess > 0:
+        index, largest = max(enumerate(plan.inline), key=lambda item: sizes[id(item[1])])
+        posts = list(largest.posts)
+        removed = 0
+        while posts and removed < excess:
+            removed += estimate_tokens(format_post_for_llm(posts.pop(0)))
+            plan.omitted_posts += 1
+
+        original = originals.pop(id(largest))
+        if original in plan.trimmed_topics:
+            plan.trimmed_topics.remove(original)
+        if posts:
+            trimmed = copy.copy(largest)
+            trimmed.posts = posts
+            plan.inline[index] = trimmed
+            originals[id(trimmed)] = original
+            sizes[id(trimmed)] = sizes[id(largest)] - removed
+            plan.trimmed_topics.append(original)
+        else:
+            del plan.inline[index]
+            plan.omitted_topics.append(original)
+            removed = sizes[id(largest)]
+
+        # Estimates of the parts removed; the whole prompt is measured again
+        # once they add up
+        excess -= removed
+        if excess <= 0:
+            excess = plan.reduce_tokens() - max_tokens
+
+
+def plan_summary(
+    activity: Activity, limits: SummaryLimits, cache_notes: bool = False
+) -> SummaryPlan:
+    """Decide which topics to condense before the final summary.
+
+    If the whole day fits in max_prompt_tokens it is summarized in one
+    request. Otherwise the largest topics are mapped to notes, largest
+    first, until the final prompt would fit. With cache_notes, topics of
+    at least CACHED_NOTES_MIN_TOKENS are mapped on every day, so their
+    notes can be reused by later runs. Mapped topics are split into parts
+    of at most chunk_tokens, and small ones share requests if there would
+    be more than max_map_calls otherwise. If there still are, the largest
+    topics lose their oldest parts first, then the smallest mapped topics
+    go back inline. Finally, if the final prompt is still over
+    max_prompt_tokens, inline topics lose their oldest posts, largest
+    topic first; plan.omitted_posts and omitted_topics record what was
+    left out.
+    """
+    topics = list(activity.topics)
+    estimated = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(
+        build_summary_prompt(activity, topics)
+    )
+    plan = SummaryPlan(activity=activity, estimated_tokens=estimated, inline=topics)
+    if estimated <= limits.max_prompt_tokens and not cache_notes:
+        return plan
+
+    sizes = {id(t): estimate_tokens(format_topic_for_llm(t)) for t in topics}
+    mapped: list[Topic] = []
+    reduce_tokens = estimated
+    for topic in sorted(topics, key=lambda t: sizes[id(t)], reverse=True):
+        size = sizes[id(topic)]
+        if reduce_tokens <= limits.max_prompt_tokens and not (
+            cache_notes and size >= CACHED_NOTES_MIN_TOKENS
+        ):
+            break
+        # Notes on topics this small would be no shorter
+        if size <= NOTES_TOKENS:
+            break
+        if topic.posts:
+            mapped.append(topic)
+            reduce_tokens -= size - NOTES_TOKENS
+    if not mapped:
+        return plan
+
+    # Share the map requests out under the cap: the largest topics give
+    # up their oldest parts, then the smallest topics are no longer mapped
+    separator = estimate_tokens(TOPIC_SEPARATOR)
+    splits = {id(topic): split_topic(topic, limits.chunk_tokens) for topic in mapped}
+    part_counts = {id(topic): len(splits[id(topic)]) for topic in mapped}
+    piece_tokens = {
+        id(piece): estimate_tokens(piece.text()) + separator
+        for pieces in splits.values()
+        for piece in pieces
+    }
+    total = sum(piece_tokens.values())
+
+    def drop_one() -> None:
+        nonlocal total
+        largest = max(mapped, key=lambda t: part_counts[id(t)])
+        if part_counts[id(largest)] > 1:
+            oldest = splits[id(largest)][-part_counts[id(largest)]]
+            part_counts[id(largest)] -= 1
+            total -= piece_tokens[id(oldest)]
+        else:
+            smallest = mapped.pop()
+            kept = splits[id(smallest)][-part_counts[id(smallest)]:]
+            total -= sum(piece_tokens[id(piece)] for piece in kept)
+
+    # Cheaply drop what cannot fit in max_map_calls full requests, then
+    # pack what is left and drop more while packing needs too many
+    while mapped and total > limits.max_map_calls * limits.chunk_tokens:
+        drop_one()
+    while True:
+        pieces = [
+            (piece_tokens[id(piece)], piece)
+            for topic in mapped
+            for piece in splits[id(topic)][-part_counts[id(topic)]:]
+        ]
+        parts = pack_parts(pieces, limits.chunk_tokens, limits.max_map_calls)
+        if len(parts) <= limits.max_map_calls or not mapped:
+            break
+        drop_one()
+
+    plan.parts = parts
+    # Renumber the kept parts, so a topic left with one part has no part note
+    for topic in mapped:
+        kept = splits[id(topic)][-part_counts[id(topic)]:]
+        if len(kept) < len(splits[id(topic)]):
+            plan.omitted_posts += len(topic.posts) - sum(len(piece.posts) for piece in kept)
+            plan.trimmed_topics.append(topic)
+            for i, piece in enumerate(kept):
+                piece.index, piece.count = i + 1, len(kept)
+
+    mapped_ids = {id(topic) for topic in mapped}
+    plan.inline = [topic for topic in topics if id(topic) not in mapped_ids]
+    _trim_inline(plan, limits.max_prompt_tokens)
+    return plan
+
+
+def build_summary_prompt(
+    activity: Activity,
+    inline: list[Topic],
+    notes: list[tuple[list[Topic], str]] | None = None,
+) -> str:
+    """Build the final summary request's user message.
+
+    Args:
+        activity: The day's activity (for the post and topic counts)
+        inline: Topics included with their posts
+        notes: Condensed notes for the remaining topics, each with the
+            topics it covers, if any
+    """
+    topic_count = len(activity.topics)
+    post_count = sum(len(t.posts) for t in activity.topics)
+    inline_text = TOPIC_SEPARATOR.join(format_topic_for_llm(topic) for topic in inline)
+
+    if notes:
+        notes_text = TOPIC_SEPARATOR.join(
+            f"{_notes_header(topics)}\n\n{text}" for topics, text in notes
+        )
+        content = (
+            "The longest discussions were condensed into notes:\n\n"
+            f"{notes_text}"
+        )
+        if inline:
+            content += f"\n\nHere is the full content of the other discussions:\n\n{inline_text}"
+    else:
+        content = f"Here is the full content of the discussions:\n\n{inline_text}"
+
+    return f"""In the past 24 hours, there were {post_count} new posts across {topic_count} topic(s).
+
+{content}
+
+Write the daily summary."""
+
+
+def _notes_header(topics: list[Topic]) -> str:
+    if len(topics) == 1:
+        return f"## Topic: {topics[0].title}\nURL: {topics[0].url}"
+    return "## Topics:\n" + "\n".join(f"- {topic.title} ({topic.url})" for topic in topics)
+
+
+def build_notes_prompt(part: MapPart) -> str:
+    """Build the user message of a map request condensing one or more topic parts."""
+    if len(part.pieces) > 1:
+        return f"""{part.text()}
+
+Write notes on these discussions."""
+    return f"""{part.text()}
+
+Write notes on this discussion."""
+
+
+@dataclass
+class Usage:
+    """Token counts reported by the API over several requests."""
+
+    requests: int = 0
+    input_tokens: int = 0  # Uncached input
+    cache_write_tokens: int = 0  # Input written to the prompt cache
+    cache_read_tokens: int = 0  # Input served from the prompt cache
+    output_tokens: int = 0
+    retries: int = 0  # Requests repeated after transient errors
+
+    def add(self, usage: anthropic.types.Usage) -> None:
+        self.requests += 1
+        self.input_tokens += usage.input_tokens
+        self.cache_write_tokens += usage.cache_creation_input_tokens or 0
+        self.cache_read_tokens += usage.cache_read_input_tokens or 0
+        self.output_tokens += usage.output_tokens
+
+    def summary(self) -> str:
+        """One-line human readable summary."""
+        retries = f", {self.retries} retries" if self.retries else ""
+        return (
+            f"{self.requests} requests, {self.input_tokens} input tokens "
+            f"+ {self.cache_read_tokens} cache hits / {self.cache_write_tokens} cache writes, "
+            f"{self.output_tokens} output tokens{retries}"
+        )
+
+
+def should_retry(error: anthropic.APIError) -> bool:
+    """Whether a failed request may succeed if repeated."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRY_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_delay(error: anthropic.APIError, attempt: int) -> float:
+    """Seconds to wait before retrying a failed request.
+
+    Full jitter: a random delay up to the exponential backoff for this
+    attempt, so concurrent requests throttled together do not retry in
+    lockstep. A Retry-After header, if sent, is the minimum.
+    """
+    backoff = min(MAX_API_BACKOFF_SECONDS, API_BACKOFF_SECONDS * 2**attempt)
+    delay = random.uniform(0, backoff)
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, MAX_API_BACKOFF_SECONDS))
+    return delay
+
+
+def prompt_key(prompt: str, posts: list[Post]) -> str:
+    """Summary cache key for a request summarizing posts."""
+    post_ids = ",".join(str(post.id) for post in posts)
+    return summary_key(PROMPT_VERSION, MODEL, SYSTEM_PROMPT, post_ids, prompt)
+
+
+def message_params(prompt: str, max_tokens: int) -> dict:
+    """Messages API parameters for one request with the shared system prompt."""
+    return {
+        "model": MODEL,
+        "max_tokens": max_tokens,
+        "system": SYSTEM_BLOCKS,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def notes_requests(plan: SummaryPlan) -> list[tuple[str, str]]:
+    """Cache key and prompt of each map request in plan."""
+    prompts = [build_notes_prompt(part) for part in plan.parts]
+    return [(prompt_key(prompt, part.posts), prompt) for prompt, part in zip(prompts, plan.parts)]
+
+
+def summary_request(plan: SummaryPlan, part_notes: list[str]) -> tuple[str, str]:
+    """Cache key and prompt of plan's final request, given each part's notes."""
+    activity = plan.activity
+    prompt = build_summary_prompt(activity, plan.inline, plan.notes(part_notes))
+    return prompt_key(prompt, [post for topic in activity.topics for post in topic.posts]), prompt
+
+
+class Summarizer:
+    """Summarization service around one long-lived AsyncAnthropic client.
+
+    The client's connection pool is reused by every request, at most
+    limits.concurrency requests are in flight at once, and throttled,
+    overloaded and failed requests (429, 5xx, connection errors and
+    timeouts) are retried with jittered exponential backoff (the SDK's own
+    retries are disabled so they do not multiply). Create
+    one per event loop and share it across summaries, e.g. for the
+    lifetime of --watch.
+    """
+
+    def __init__(self, api_key: str, limits: SummaryLimits | None = None):
+        self.limits = limits or SummaryLimits()
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key, timeout=self.limits.timeout_seconds, max_retries=0
+        )
+        self._semaphore = asyncio.Semaphore(self.limits.concurrency)
+
+    async def __aenter__(self) -> "Summarizer":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    async def complete(self, prompt: str, max_tokens: int, usage: Usage | None = None) -> str:
+        """Send one request with the shared system prompt and return its text."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    message = await self.client.messages.create(
+                        **message_params(prompt, max_tokens)
+                    )
+                break
+            except anthropic.APIError as e:
+                if not should_retry(e) or attempt == MAX_API_RETRIES:
+                    raise
+                # Back off outside the semaphore so other requests can proceed
+                delay = retry_delay(e, attempt)
+                if isinstance(e, anthropic.APIStatusError):
+                    print(f"Claude API returned {e.status_code}, retrying in {delay:.1f}s")
+                else:
+                    name = type(e).__name__
+                    print(f"Claude API request failed ({name}), retrying in {delay:.1f}s")
+                if usage is not None:
+                    usage.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+        if usage is not None:
+            usage.add(message.usage)
+        return message.content[0].text.strip()
+
+    async def summarize(self, activity: Activity, cache: SummaryCache | None = None) -> str:
+        """Summarize a day's activity; see summarize_activity_async."""
+        plan = plan_summary(activity, self.limits, cache_notes=cache is not None)
+        print(f"Summary plan: {plan.summary()}")
+        omissions = plan.omissions()
+        if omissions:
+            print(f"Warning: {omissions}")
+
+        usage = Usage()
+        try:
+            return await self._summarize_plan(plan, cache, usage)
+        finally:
+            if usage.requests or usage.retries:
+                print(f"Claude usage: {usage.summary()}")
+
+    async def _summarize_plan(
+        self,
+        plan: SummaryPlan,
+        cache: SummaryCache | None,
+        usage: Usage,
+    ) -> str:
+        part_notes: list[str] = []
+        if plan.map_reduce:
+            requests = notes_requests(plan)
+            part_notes = [cache.get(key) if cache else None for key, _ in requests]
+            missing = [i for i, text in enumerate(part_notes) if text is None]
+
+            results = await asyncio.gather(
+                *(self.complete(requests[i][1], NOTES_MAX_TOKENS, usage) for i in missing),
+                return_exceptions=True,
+            )
+            # Cache the notes that did come back before giving up on the day
+            errors = [r for r in results if isinstance(r, BaseException)]
+            for i, text in zip(missing, results):
+                if isinstance(text, str):
+                    part_notes[i] = text
+                    if cache is not None:
+                        cache.put(requests[i][0], text)
+            if errors:
+                raise errors[0]
+            if cache is not None:
+                print(
+                    f"Summary cache: {len(requests) - len(missing)} of {len(requests)} "
+                    "notes reused"
+                )
+
+        key, prompt = summary_request(plan, part_notes)
+        summary = cache.get(key) if cache else None
+        if summary is not None:
+            print("Summary cache: summary reused")
+            return summary
+
+        summary = await self.complete(prompt, SUMMARY_MAX_TOKENS, usage)
+        if cache is not None:
+            cache.put(key, summary)
+        return summary
+
+
+async def summarize_activity_async(
+    activity: Activity,
+    api_key: str,
+    limits: SummaryLimits | None = None,
+    cache: SummaryCache | None = None,
+    summarizer: Summarizer | None = None,
+) -> str:
+    """Summarize a day's activity within the given limits.
+
+    Small days take a single request. Larger ones are planned with
+    plan_summary: topic parts are condensed to notes concurrently (at
+    most limits.concurrency at a time), then one request summarizes the
+    notes together with the remaining topics.
+
+    With a cache, notes and the final summary are looked up by a hash of
+    their prompt, post IDs, model and PROMPT_VERSION first, so only parts
+    whose posts changed are sent to Claude, and an unchanged day (e.g. a
+    dry run followed by the real run) needs no requests at all.
+
+    Args:
+        activity: The activity to summarize
+        api_key: Anthropic API key
+        limits: Size, cost and latency bounds (defaults if not given)
+        cache: Summary cache to read and fill
+        summarizer: Shared summarizer; a new one is opened if not given
+            (its own limits apply instead of limits)
+
+    Returns:
+        A summary of the discussions
+    """
+    if summarizer is None:
+        async with Summarizer(api_key, limits) as summarizer:
+            return await summarizer.summarize(activity, cache)
+    return await summarizer.summarize(activity, cache)
+
+
+def summarize_activity(
+    activity: Activity,
+    api_key: str,
+    limits: SummaryLimits | None = None,
+    cache: SummaryCache | None = None,
+) -> str:
+    """Synchronous wrapper for summarize_activity_async."""
+    return asyncio.run(summarize_activity_async(activity, api_key, limits, cache))
@@ -0,0 +1,123 @@
+"""Content-addressed on-disk cache of generated summaries."""
+
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+SUMMARY_CACHE_DIR = Path.home() / ".cache" / "nstr-report" / "summaries"
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024  # 8 MiB
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600  # Entries unused for 30 days are dropped
+
+
+@dataclass
+class SummaryEntry:
+    """Bookkeeping for one cached summary."""
+
+    size: int
+    created_at: float
+    used_at: float
+
+
+def summary_key(*parts: str) -> str:
+    """Derive a cache key from everything that determines a summary."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Summaries keyed by a hash of their inputs, with age and LRU eviction.
+
+    Keys are built with summary_key from the model, prompt version and
+    the exact content summarized, so a changed topic or prompt simply
+    misses and stale entries age out.
+    """
+
+    def __init__(
+        self,
+        path: Path = SUMMARY_CACHE_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._index_path = path / "index.json"
+        self._entries: dict[str, SummaryEntry] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            raw = json.loads(self._index_path.read_text())
+            self._entries = {k: SummaryEntry(**v) for k, v in raw.items()}
+        except (OSError, ValueError, TypeError):
+            self._entries = {}
+
+    def _text_path(self, key: str) -> Path:
+        return self.path / f"{key}.txt"
+
+    def get(self, key: str) -> str | None:
+        """Return the cached summary for key, or None if missing."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            text = self._text_path(key).read_text()
+        except OSError:
+            del self._entries[key]
+            self._dirty = True
+            self.misses += 1
+            return None
+
+        entry.used_at = time.time()
+        self._dirty = True
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Cache a summary."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp = self._text_path(key).with_suffix(".tmp")
+        tmp.write_text(text)
+        tmp.replace(self._text_path(key))
+
+        now = time.time()
+        self._entries[key] = SummaryEntry(size=len(text.encode()), created_at=now, used_at=now)
+        self._dirty = True
+
+    def _drop(self, key: str) -> None:
+        self._text_path(key).unlink(missing_ok=True)
+        del self._entries[key]
+        self._dirty = True
+
+    def evict(self) -> None:
+        """Drop entries unused for max_age_seconds, then LRU until under max_bytes."""
+        cutoff = time.time() - self.max_age_seconds
+        for key, entry in list(self._entries.items()):
+            if entry.used_at < cutoff:
+                self._drop(key)
+
+        total = sum(e.size for e in self._entries.values())
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1].used_at):
+            if total <= self.max_bytes:
+                break
+            self._drop(key)
+            total -= entry.size
+
+    def save(self) -> None:
+        """Evict if needed and persist the index."""
+        if not self._dirty:
+            return
+        self.evict()
+        self.path.mkdir(parents=True, exist_ok=True)
+        data = {k: asdict(e) for k, e in self._entries.items()}
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(self._index_path)
+        self._dirty = False
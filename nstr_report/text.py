@@ -0,0 +1,176 @@
+"""Convert Discourse post bodies to plain text."""
+
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+CODE_FENCE = "```"
+
+
+class _TextExtractor(HTMLParser):
+    """Single-pass HTML tokenizer that emits normalized plain text.
+
+    Whitespace is collapsed as text arrives, entities are decoded by the
+    tokenizer, <pre> blocks are kept verbatim between code fences, image
+    alt text is kept as [alt], and quoted <aside class="quote"> content
+    is dropped.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.space = False  # Whitespace pending before the next word
+        self.pre_depth = 0
+        self.quote_depth = 0
+
+    def _emit(self, text: str) -> None:
+        if self.space and self.parts and not self.parts[-1].endswith("\n"):
+            self.parts.append(" ")
+        self.space = False
+        self.parts.append(text)
+
+    def _fence(self) -> None:
+        self.space = False
+        self.parts.append(f"\n{CODE_FENCE}\n")
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.quote_depth:
+            if tag == "aside":
+                self.quote_depth += 1
+            return
+
+        if tag == "aside" and "quote" in (dict(attrs).get("class") or "").split():
+            self.quote_depth = 1
+        elif tag == "pre":
+            if not self.pre_depth:
+                self._fence()
+            self.pre_depth += 1
+        elif tag == "img":
+            alt = dict(attrs).get("alt")
+            if alt is not None:
+                self._emit(f"[{alt}]")
+            else:
+                self.space = True
+        elif not self.pre_depth:
+            self.space = True
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.quote_depth:
+            if tag == "aside":
+                self.quote_depth -= 1
+                self.space = True
+            return
+
+        if tag == "pre" and self.pre_depth:
+            self.pre_depth -= 1
+            if not self.pre_depth:
+                if self.parts and self.parts[-1].endswith("\n"):
+                    self.parts[-1] = self.parts[-1].rstrip("\n")
+                self._fence()
+        elif not self.pre_depth:
+            self.space = True
+
+    def handle_data(self, data: str) -> None:
+        if self.quote_depth:
+            return
+        if self.pre_depth:
+            self.parts.append(data)
+            return
+
+        words = data.split()
+        if not words:
+            self.space = True
+            return
+        if data[0].isspace():
+            self.space = True
+        self._emit(" ".join(words))
+        self.space = data[-1].isspace()
+
+    def text(self) -> str:
+        return "".join(self.parts).strip()
+
+
+def html_to_text(html: str) -> str:
+    """Convert cooked post HTML to plain text in a single pass."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+_QUOTE_RE = re.compile(r"\[quote(?:=[^\]]*)?\].*?\[/quote\]", re.DOTALL | re.IGNORECASE)
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_IMAGE_RE = re.compile(r"!\[([^\]|]*)(?:\|[^\]]*)?\]\([^)]*\)")
+_LINK_RE = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_LINE_PREFIX_RE = re.compile(r"^\s{0,3}(?:#{1,6}\s+|>\s?)+")
+_INLINE_RE = re.compile(r"\*\*|`")
+# __strong__ only opens and closes outside words, as in CommonMark, so
+# snake__case and foo__bar__ keep their underscores
+_STRONG_RE = re.compile(r"(?<!\w)__(?=\S)(.+?)(?<=\S)__(?!\w)")
+
+# Inline HTML Discourse allows in markdown. Other <...> is left alone, since
+# in raw posts it is usually text: "peers < 10", "-maxconnections=<n>"
+_HTML_TAGS = frozenset(
+    "a abbr b big blockquote br code del details div em h1 h2 h3 h4 h5 h6 hr i "
+    "img ins kbd li mark ol p pre s small span strike strong sub summary sup "
+    "table tbody td th thead tr u ul".split()
+)
+_TAG_RE = re.compile(r"</?([A-Za-z][A-Za-z0-9]*)(?:\s[^<>\n]*)?/?>")
+
+
+def _strip_tag(match: re.Match) -> str:
+    return "" if match.group(1).lower() in _HTML_TAGS else match.group(0)
+
+
+def _strip_strong(match: re.Match) -> str:
+    # A lone identifier is far more likely a dunder name than bold text
+    inner = match.group(1)
+    return match.group(0) if inner.isidentifier() else inner
+
+
+def markdown_to_text(raw: str) -> str:
+    """Convert raw post markdown to plain text.
+
+    A cheap line-based normalizer producing the same shape of output as
+    html_to_text: quotes are dropped, images become [alt], links keep
+    their text, fenced code is kept verbatim between code fences and all
+    other whitespace is collapsed.
+    """
+    raw = _QUOTE_RE.sub(" ", raw)
+
+    parts: list[str] = []
+    words: list[str] = []
+    code: list[str] | None = None
+
+    for line in raw.splitlines():
+        if _FENCE_RE.match(line):
+            if code is None:
+                code = []
+                if words:
+                    parts.append(" ".join(words))
+                    words = []
+            else:
+                parts.append(f"{CODE_FENCE}\n" + "\n".join(code) + f"\n{CODE_FENCE}")
+                code = None
+            continue
+
+        if code is not None:
+            code.append(line)
+            continue
+
+        line = _LINE_PREFIX_RE.sub("", line)
+        line = _IMAGE_RE.sub(r"[\1]", line)
+        line = _LINK_RE.sub(r"\1", line)
+        line = _STRONG_RE.sub(_strip_strong, line)
+        line = _INLINE_RE.sub("", line)
+        line = _TAG_RE.sub(_strip_tag, line)
+        words.extend(unescape(line).split())
+
+    if code is not None:
+        parts.append(f"{CODE_FENCE}\n" + "\n".join(code) + f"\n{CODE_FENCE}")
+    if words:
+        parts.append(" ".join(words))
+    return "\n".join(parts).strip()
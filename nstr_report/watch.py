@@ -0,0 +1,155 @@
+"""Background polling that keeps the store current between reports."""
+
+import asyncio
+import inspect
+from collections.abc import Callable
+from datetime import datetime, time, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from .fetcher import CONTENT_COOKED, DEFAULT_MAX_CONCURRENCY, FETCH_MODE_TOPICS, Activity
+from .httpcache import HTTPCache
+from .session import FetchBudget, FetchSession
+from .sources import ForumSource, fetch_sources_async
+
+if TYPE_CHECKING:
+    from .store import Store
+
+# Poll interval bounds; quiet polls back off, active ones speed up
+MIN_POLL_SECONDS = 60
+DEFAULT_POLL_SECONDS = 300
+MAX_POLL_SECONDS = 1800
+POLL_BACKOFF = 1.5  # Interval multiplier after a poll with no new posts
+
+
+def parse_report_time(value: str) -> time:
+    """Parse an "HH:MM" report time (UTC)."""
+    hour, _, minute = value.partition(":")
+    return time(int(hour), int(minute or 0), tzinfo=timezone.utc)
+
+
+def next_report_time(now: datetime, report_at: time) -> datetime:
+    """Return the first report_at strictly after now."""
+    candidate = datetime.combine(now.date(), report_at)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+class PollInterval:
+    """Adaptive delay between polls.
+
+    Halves after a poll that found new posts and grows by POLL_BACKOFF
+    after a quiet one, within [MIN_POLL_SECONDS, MAX_POLL_SECONDS].
+    """
+
+    def __init__(self, seconds: float = DEFAULT_POLL_SECONDS):
+        self.seconds = seconds
+
+    def update(self, new_posts: int) -> float:
+        """Record a poll's outcome and return the delay before the next one."""
+        if new_posts:
+            self.seconds = max(MIN_POLL_SECONDS, self.seconds / 2)
+        else:
+            self.seconds = min(MAX_POLL_SECONDS, self.seconds * POLL_BACKOFF)
+        return self.seconds
+
+
+async def watch_async(
+    sources: list[ForumSource],
+    store: "Store",
+    report: Callable[[Activity], object],
+    report_at: time = time(0, 0, tzinfo=timezone.utc),
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    http_cache: bool = True,
+    mode: str = FETCH_MODE_TOPICS,
+    content: str = CONTENT_COOKED,
+    budget_seconds: float | None = None,
+) -> None:
+    """Poll sources into the store until interrupted, reporting once a day.
+
+    Every poll is an incremental sync over one long-lived session:
+    latest.json is revalidated with conditional GETs and only topics whose
+    counters moved are fetched. At report_at the last poll's Activity,
+    already built from the store, is handed to report: coroutine
+    functions are awaited in the watch loop (so a long-lived summarizer
+    can share it), anything else runs in a worker thread, since
+    publishing runs its own event loop.
+
+    Args:
+        sources: Forums and feeds to poll
+        store: Local store kept in sync
+        report: Called with the day's Activity at each report time
+        report_at: Time of day (UTC) to report
+
+    The remaining arguments are as for fetch_sources_async; budget_seconds
+    applies to each poll.
+    """
+    cache = HTTPCache() if http_cache else None
+    interval = PollInterval()
+    seen: set[tuple[str, int]] | None = None
+    next_report = next_report_time(datetime.now(timezone.utc), report_at)
+    print(f"Watching {len(sources)} source(s), next report at {next_report:%Y-%m-%d %H:%M} UTC")
+
+    async with FetchSession(
+        max_connections=max_concurrency * len(sources), cache=cache
+    ) as session:
+        while True:
+            session.budget = FetchBudget(budget_seconds) if budget_seconds else None
+            activity = None
+            try:
+                activity = await fetch_sources_async(
+                    sources, max_concurrency, session,
+                    mode=mode, store=store, content=content,
+                )
+            except Exception as e:
+                print(f"Warning: Poll failed: {e}")
+            if cache is not None:
+                cache.save()
+
+            new_posts = 0
+            if activity is not None:
+                posts = {(t.source_url, p.id) for t in activity.topics for p in t.posts}
+                new_posts = len(posts - seen) if seen is not None else 0
+                seen = posts
+            delay = interval.update(new_posts)
+
+            now = datetime.now(timezone.utc)
+            if now >= next_report:
+                if activity is None:
+                    activity = await fetch_sources_async(
+                        sources, max_concurrency, store=store, offline=True,
+                    )
+                print(f"HTTP: {session.stats.summary()}")
+                if inspect.iscoroutinefunction(report):
+                    await report(activity)
+                else:
+                    await asyncio.to_thread(report, activity)
+                next_report = next_report_time(now, report_at)
+
+            print(f"Poll: {new_posts} new posts, next poll in {delay:.0f}s")
+            wait = min(delay, (next_report - datetime.now(timezone.utc)).total_seconds())
+            await asyncio.sleep(max(0.0, wait))
+
+
+def watch(
+    sources: list[ForumSource],
+    store: "Store",
+    report: Callable[[Activity], object],
+    report_at: time = time(0, 0, tzinfo=timezone.utc),
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    http_cache: bool = True,
+    mode: str = FETCH_MODE_TOPICS,
+    content: str = CONTENT_COOKED,
+    budget_seconds: float | None = None,
+) -> None:
+    """Synchronous wrapper for watch_async; returns on Ctrl-C."""
+    try:
+        asyncio.run(
+            watch_async(
+                sources, store, report, report_at, max_concurrency,
+                http_cache=http_cache, mode=mode, content=content,
+                budget_seconds=budget_seconds,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
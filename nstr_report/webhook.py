@@ -0,0 +1,247 @@
+"""Discourse webhook receiver for push-based ingestion into the store."""
+
+import hashlib
+import hmac
+import json
+from collections.abc import Iterable
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import httpx
+
+from .fetcher import Topic, parse_datetime, parse_post
+from .store import Store
+
+DEFAULT_WEBHOOK_HOST = "127.0.0.1"
+DEFAULT_WEBHOOK_PORT = 8787
+
+# Larger request bodies are rejected without being read
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+# Requests are handled one at a time, so a client that stalls mid-request
+# must not hold up later deliveries for longer than this
+WEBHOOK_TIMEOUT_SECONDS = 10.0
+
+POST_EVENTS = ("post_created", "post_edited")
+TOPIC_EVENTS = ("topic_created", "topic_edited")
+
+# Only regular and moderator posts are public; whispers are staff-only
+PUBLIC_POST_TYPES = (1, 2)
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """Compute the X-Discourse-Event-Signature header value for a body."""
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """Check a webhook body against its X-Discourse-Event-Signature header."""
+    if not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature)
+
+
+class WebhookReceiver:
+    """Applies verified Discourse webhook payloads to the store.
+
+    post_created and post_edited store the post (creating a stub topic if
+    needed); topic_created and topic_edited update topic metadata. Private
+    messages and whispers are ignored, as are forums not in source_urls.
+    """
+
+    def __init__(
+        self,
+        store: Store,
+        secret: str,
+        source_urls: Iterable[str],
+        raw: bool = False,
+    ):
+        self.store = store
+        self.secret = secret
+        self.source_urls = {url.rstrip("/") for url in source_urls}
+        self.raw = raw
+
+    def source_for(self, instance: str | None) -> str | None:
+        """Map an X-Discourse-Instance header to a configured source URL."""
+        if instance:
+            instance = instance.rstrip("/")
+            return instance if instance in self.source_urls else None
+        if len(self.source_urls) == 1:
+            return next(iter(self.source_urls))
+        return None
+
+    def handle(self, event: str, source_url: str, payload: dict) -> str:
+        """Apply one webhook payload, returning a short outcome for the log."""
+        if event in POST_EVENTS:
+            post_data = payload.get("post", {})
+            if post_data.get("topic_archetype") == "private_message":
+                return "ignored private message"
+            if post_data.get("post_type", 1) not in PUBLIC_POST_TYPES:
+                return "ignored non-public post"
+
+            post = parse_post(post_data, self.raw)
+            topic = Topic(
+                id=post_data["topic_id"],
+                title=post_data.get("topic_title", ""),
+                slug=post_data.get("topic_slug", ""),
+                author=post.author if post.post_number == 1 else "unknown",
+                posts_count=0,
+                last_posted_at=0,
+                bumped_at=post.created_at,
+                created_at=post.created_at,
+                tags=[],
+                url=f"{source_url}/t/{post_data.get('topic_slug', '')}/{post_data['topic_id']}",
+                source_url=source_url,
+            )
+            self.store.save_post(source_url, topic, post, new=event == "post_created")
+            return f"stored post {post.id} in topic {topic.id}"
+
+        if event in TOPIC_EVENTS:
+            topic_data = payload.get("topic", {})
+            if topic_data.get("archetype") == "private_message":
+                return "ignored private message"
+
+            created_at = parse_datetime(topic_data["created_at"])
+            topic = Topic(
+                id=topic_data["id"],
+                title=topic_data["title"],
+                slug=topic_data["slug"],
+                author=topic_data.get("created_by", {}).get("username", "unknown"),
+                posts_count=0,
+                last_posted_at=0,
+                bumped_at=(
+                    parse_datetime(topic_data["bumped_at"])
+                    if topic_data.get("bumped_at") else created_at
+                ),
+                created_at=created_at,
+                # Newer Discourse versions send tags as objects
+                tags=[t["name"] if isinstance(t, dict) else t for t in topic_data.get("tags", [])],
+                url=f"{source_url}/t/{topic_data['slug']}/{topic_data['id']}",
+                source_url=source_url,
+            )
+            self.store.save_topic_metadata(source_url, topic)
+            return f"stored topic {topic.id}"
+
+        return "ignored"
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    receiver: WebhookReceiver  # Set on the per-server subclass
+    timeout = WEBHOOK_TIMEOUT_SECONDS
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _reply(self, status: int, message: str) -> None:
+        body = message.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        # A negative length would make read() wait for the client to hang up
+        if length < 0:
+            self._reply(400, "bad content length")
+            return
+        if length > MAX_BODY_BYTES:
+            self._reply(413, "payload too large")
+            return
+        try:
+            body = self.rfile.read(length)
+        except TimeoutError:
+            print("Warning: Dropped a webhook whose body did not arrive in time")
+            self.close_connection = True
+            return
+
+        signature = self.headers.get("X-Discourse-Event-Signature")
+        if not verify_signature(self.receiver.secret, body, signature):
+            print("Warning: Rejected webhook with a bad signature")
+            self._reply(401, "bad signature")
+            return
+
+        source_url = self.receiver.source_for(self.headers.get("X-Discourse-Instance"))
+        if source_url is None:
+            print(f"Warning: Rejected webhook from {self.headers.get('X-Discourse-Instance')}")
+            self._reply(403, "unknown instance")
+            return
+
+        event = self.headers.get("X-Discourse-Event", "")
+        try:
+            outcome = self.receiver.handle(event, source_url, json.loads(body))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Malformed {event} webhook: {e}")
+            self._reply(400, "malformed payload")
+            return
+
+        print(f"Webhook {event}: {outcome}")
+        self._reply(200, outcome)
+
+
+def make_webhook_server(
+    receiver: WebhookReceiver,
+    host: str = DEFAULT_WEBHOOK_HOST,
+    port: int = DEFAULT_WEBHOOK_PORT,
+) -> HTTPServer:
+    """Bind an HTTP server that passes webhook deliveries to receiver.
+
+    Pass port 0 to bind any free port; the chosen one is server.server_port.
+    """
+    handler = type("WebhookHandler", (_WebhookHandler,), {"receiver": receiver})
+    return HTTPServer((host, port), handler)
+
+
+def serve_webhooks(
+    receiver: WebhookReceiver,
+    host: str = DEFAULT_WEBHOOK_HOST,
+    port: int = DEFAULT_WEBHOOK_PORT,
+) -> None:
+    """Serve the webhook endpoint until interrupted.
+
+    Requests are handled one at a time on this thread, which also owns the
+    store's SQLite connection. A request whose body does not arrive within
+    WEBHOOK_TIMEOUT_SECONDS is dropped so it cannot block later ones.
+    """
+    with make_webhook_server(receiver, host, port) as server:
+        print(f"Listening for Discourse webhooks on http://{host}:{server.server_port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def replay_webhooks(url: str, secret: str, captures: Iterable[Path]) -> list[int]:
+    """Send captured webhook payloads to a receiver, signed with secret.
+
+    Each capture is a JSON file with "event", "instance" and "payload" keys,
+    as saved from Discourse's webhook event log.
+
+    Returns:
+        HTTP status code returned for each capture, in order
+    """
+    statuses = []
+    with httpx.Client() as client:
+        for path in captures:
+            capture = json.loads(Path(path).read_text())
+            body = json.dumps(capture["payload"]).encode()
+            event = capture["event"]
+            response = client.post(
+                url,
+                content=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-Discourse-Event": event,
+                    "X-Discourse-Event-Type": event.partition("_")[0],
+                    "X-Discourse-Instance": capture.get("instance", ""),
+                    "X-Discourse-Event-Signature": sign_payload(secret, body),
+                },
+            )
+            print(f"{path}: {response.status_code} {response.text}")
+            statuses.append(response.status_code)
+    return statuses
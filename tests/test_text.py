@@ -0,0 +1,16 @@
+"""Plain-text conversion of raw post markdown."""
+
+from nstr_report.text import markdown_to_text
+
+
+def test_strong_emphasis_is_stripped():
+    assert markdown_to_text("This is **very** __really important__.") == (
+        "This is very really important."
+    )
+
+
+def test_intraword_underscores_are_kept():
+    raw = "Override `__init__` and __main__, not my__var or foo__bar__baz."
+    assert markdown_to_text(raw) == (
+        "Override __init__ and __main__, not my__var or foo__bar__baz."
+    )
@@ -0,0 +1,86 @@
+"""Replay captured Discourse webhooks through a live receiver."""
+
+import queue
+import socket
+import threading
+from pathlib import Path
+
+from nstr_report import webhook
+from nstr_report.store import Store
+from nstr_report.webhook import WebhookReceiver, make_webhook_server, replay_webhooks
+
+CAPTURES = Path(__file__).parent.parent / "examples" / "webhooks"
+SOURCE_URL = "https://bnoc.xyz"
+SECRET = "test-secret"
+
+
+def _serve(db_path: Path, ready: queue.Queue) -> None:
+    # The store's SQLite connection must be opened on the serving thread
+    store = Store(db_path)
+    receiver = WebhookReceiver(store, SECRET, [SOURCE_URL])
+    with make_webhook_server(receiver, port=0) as server:
+        ready.put(server)
+        server.serve_forever()
+    store.close()
+
+
+def _replay(
+    tmp_path: Path, secret: str, captures: list[Path], stall: bool = False
+) -> list[int]:
+    ready: queue.Queue = queue.Queue()
+    thread = threading.Thread(target=_serve, args=(tmp_path / "store.db", ready))
+    thread.start()
+    server = ready.get(timeout=5)
+    try:
+        if stall:
+            # Promise a body that never arrives, and keep the connection open
+            stalled = socket.create_connection(("127.0.0.1", server.server_port))
+            stalled.sendall(b"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\n")
+        url = f"http://127.0.0.1:{server.server_port}/"
+        statuses = replay_webhooks(url, secret, captures)
+        if stall:
+            stalled.close()
+        return statuses
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def test_replayed_posts_land_in_store(tmp_path):
+    captures = [
+        CAPTURES / "topic_created.json",
+        CAPTURES / "post_created.json",
+        CAPTURES / "post_edited.json",
+    ]
+    assert _replay(tmp_path, SECRET, captures) == [200, 200, 200]
+
+    store = Store(tmp_path / "store.db")
+    try:
+        assert store.post_ids(SOURCE_URL, 912) == {2741}
+        mark = store.topic_marks(SOURCE_URL)[912]
+        assert mark.highest_post_number == 1
+        assert mark.posts_count == 1
+        # The edit replaced the post without counting it a second time
+        (content,) = store.conn.execute(
+            "SELECT content FROM posts WHERE source_url = ? AND id = 2741", (SOURCE_URL,)
+        ).fetchone()
+        assert "Edit: also on testnet." in content
+    finally:
+        store.close()
+
+
+def test_bad_signature_is_rejected(tmp_path):
+    captures = [CAPTURES / "post_created.json"]
+    assert _replay(tmp_path, "wrong-secret", captures) == [401]
+
+    store = Store(tmp_path / "store.db")
+    try:
+        assert store.topic_marks(SOURCE_URL) == {}
+    finally:
+        store.close()
+
+
+def test_stalled_client_does_not_block_deliveries(tmp_path, monkeypatch):
+    monkeypatch.setattr(webhook._WebhookHandler, "timeout", 0.5)
+    captures = [CAPTURES / "post_created.json"]
+    assert _replay(tmp_path, SECRET, captures, stall=True) == [200]